@@ -0,0 +1,98 @@
+"""
+Benchmarks of the plugin hooks on synthetic projects and pages, using pytest-benchmark.
+
+Usage:
+
+```bash
+pip install pytest-benchmark
+pytest benchmarks/bench_hooks.py --benchmark-autosave
+# After changing the code, compare against the last saved run
+pytest benchmarks/bench_hooks.py --benchmark-compare
+```
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from mkdocs.config import load_config  # noqa: E402
+from mkdocs.structure.files import get_files  # noqa: E402
+from mkdocs.structure.nav import get_navigation  # noqa: E402
+
+from mkdocs_enumerate_headings_plugin.cache import StructureCache  # noqa: E402
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage  # noqa: E402
+from mkdocs_enumerate_headings_plugin.stream_html_page import StreamHTMLPage  # noqa: E402
+from synthetic import make_page, make_project  # noqa: E402
+
+ENGINES = [
+    pytest.param((HTMLPage, "html.parser"), id="html.parser"),
+    pytest.param((HTMLPage, "lxml"), id="lxml"),
+    pytest.param((StreamHTMLPage, None), id="stream"),
+]
+HEADINGS = [50, 500]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    engine, parser = request.param
+    if parser == "lxml":
+        pytest.importorskip("lxml")
+    return engine, parser
+
+
+@pytest.mark.parametrize("prescan", ["render", "markdown"])
+def test_on_nav(benchmark, tmp_path, prescan):
+    config_file = make_project(tmp_path, n_pages=200, n_headings=20, plugin_config="prescan: %s" % prescan)
+    config = load_config(str(config_file))
+    plugin = config.plugins["enumerate-headings"]
+    config = plugin.on_config(config)
+    files = get_files(config)
+
+    def setup():
+        # Every round counts all pages, as a new build would
+        StructureCache.clear()
+        return (get_navigation(files, config),), {"config": config, "files": files}
+
+    benchmark.pedantic(plugin.on_nav, setup=setup, rounds=5)
+
+
+@pytest.mark.parametrize("n_headings", HEADINGS)
+def test_construction(benchmark, engine, n_headings):
+    engine, parser = engine
+    content = make_page(n_headings)
+    benchmark(engine, content, parser=parser)
+
+
+@pytest.mark.parametrize("n_headings", HEADINGS)
+def test_numbering(benchmark, engine, n_headings):
+    engine, parser = engine
+    page = engine(make_page(n_headings), parser=parser)
+
+    def number():
+        page._find_section_numbering()
+        page.set_page_chapter(1)
+
+    benchmark(number)
+
+
+@pytest.mark.parametrize("n_headings", HEADINGS)
+@pytest.mark.parametrize("toc_depth", [2, 6])
+def test_enumerate_toc(benchmark, engine, n_headings, toc_depth):
+    engine, parser = engine
+    content = make_page(n_headings, toc_depth=toc_depth)
+
+    def setup():
+        page = engine(content, parser=parser)
+        page.set_page_chapter(1)
+        return (page,), {}
+
+    benchmark.pedantic(lambda page: page.enumerate_toc(depth=6), setup=setup, rounds=10)
+
+
+@pytest.mark.parametrize("n_headings", HEADINGS)
+def test_serialization(benchmark, engine, n_headings):
+    engine, parser = engine
+    page = engine(make_page(n_headings), parser=parser)
+    page.set_page_chapter(1)
+    page.enumerate_headings()
+    page.enumerate_toc(depth=6)
+    benchmark(str, page)
@@ -0,0 +1,54 @@
+"""
+Benchmark enumerating a large HTML page with each BeautifulSoup parser backend,
+and with the stream engine.
+
+Usage:
+
+```bash
+python benchmarks/bench_parsers.py --headings 2000
+```
+"""
+import argparse
+import importlib.util
+import timeit
+
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage, PARSERS
+from mkdocs_enumerate_headings_plugin.stream_html_page import StreamHTMLPage
+from synthetic import make_page
+
+
+def enumerate_page(engine, content, parser):
+    page = engine(content, parser=parser)
+    page.set_page_chapter(1)
+    page.enumerate_headings()
+    page.enumerate_toc(depth=6)
+    return str(page)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--headings", type=int, default=500)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+
+    content = make_page(args.headings)
+    print("Page of %s headings, %s KB" % (args.headings, len(content) // 1024))
+
+    runs = [("beautifulsoup", HTMLPage, p) for p, package in PARSERS.items()]
+    runs.append(("stream", StreamHTMLPage, None))
+    for engine_name, engine, parser in runs:
+        if parser and PARSERS[parser] and not importlib.util.find_spec(PARSERS[parser]):
+            print("%-30s not installed" % parser)
+            continue
+        seconds = min(
+            timeit.repeat(
+                lambda: enumerate_page(engine, content, parser),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print("%-30s %.3fs" % ("%s (%s)" % (engine_name, parser or "-"), seconds))
+
+
+if __name__ == "__main__":
+    main()
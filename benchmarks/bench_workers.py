@@ -0,0 +1,55 @@
+"""
+Benchmark counting heading 1's of generated markdown pages,
+serially and in a process pool (the `workers` option), for increasing page counts.
+
+Usage:
+
+```bash
+python benchmarks/bench_workers.py --pages 100 1000 10000 --workers 2 4 8
+```
+"""
+import argparse
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from mkdocs_enumerate_headings_plugin import markdown_scan
+from synthetic import make_markdown
+
+
+def scan(sources, workers):
+    count_h1s = functools.partial(markdown_scan.count_h1s, baselevel=1, superfences=False)
+    if workers == 1:
+        return [count_h1s(source) for source in sources]
+    chunksize = max(1, len(sources) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(count_h1s, sources, chunksize=chunksize))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 5000])
+    argparser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    argparser.add_argument("--headings", type=int, default=50)
+    args = argparser.parse_args()
+
+    print("%8s %10s %s" % ("pages", "serial", " ".join("%14s" % ("%s workers" % w) for w in args.workers)))
+    for n_pages in args.pages:
+        sources = [make_markdown(args.headings, seed=page) for page in range(n_pages)]
+
+        start = time.perf_counter()
+        expected = scan(sources, 1)
+        serial = time.perf_counter() - start
+
+        columns = []
+        for workers in args.workers:
+            start = time.perf_counter()
+            assert scan(sources, workers) == expected
+            seconds = time.perf_counter() - start
+            columns.append("%7.3fs x%4.1f" % (seconds, serial / seconds))
+
+        print("%8s %9.3fs %s" % (n_pages, serial, " ".join(columns)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Generators of synthetic pages and MkDocs projects for the benchmarks.
+"""
+import random
+from pathlib import Path
+
+# Relative frequency of each heading depth (h1-h6) after the first heading of a page
+DEPTH_DISTRIBUTION = (1, 4, 8, 4, 1, 0)
+
+
+def make_depths(n_headings: int, distribution=DEPTH_DISTRIBUTION, seed: int = 0) -> list:
+    """
+    Args:
+        n_headings (int): number of headings
+        distribution (tuple): relative frequency of depths 1 to 6
+        seed (int): seed of the random generator
+
+    Returns:
+        list: depths of the headings of a page, starting with a heading 1
+    """
+    rng = random.Random(seed)
+    depths = rng.choices(range(1, 7), weights=distribution, k=max(n_headings - 1, 0))
+    return [1] + depths if n_headings else []
+
+
+def make_markdown(n_headings: int, distribution=DEPTH_DISTRIBUTION, seed: int = 0) -> str:
+    """
+    Args:
+        n_headings (int): number of headings
+        distribution (tuple): relative frequency of depths 1 to 6
+        seed (int): seed of the random generator
+
+    Returns:
+        str: markdown source with headings, paragraphs and code blocks
+    """
+    lines = []
+    for i, depth in enumerate(make_depths(n_headings, distribution, seed)):
+        lines.append("%s Heading %s" % ("#" * depth, i))
+        lines.append("")
+        lines.append("Some *text* with a [link](#heading-0) and `code`.")
+        lines.append("")
+        if i % 5 == 0:
+            lines.append("```python\n# not a heading\nprint(%s)\n```" % i)
+            lines.append("")
+    return "\n".join(lines)
+
+
+def make_page(n_headings: int, distribution=DEPTH_DISTRIBUTION, toc_depth: int = 6, seed: int = 0) -> str:
+    """
+    Args:
+        n_headings (int): number of headings
+        distribution (tuple): relative frequency of depths 1 to 6
+        toc_depth (int): deepest heading level listed in the table of contents
+        seed (int): seed of the random generator
+
+    Returns:
+        str: themed HTML page with a table of contents and content
+    """
+    toc = []
+    content = []
+    for i, depth in enumerate(make_depths(n_headings, distribution, seed)):
+        if depth <= toc_depth:
+            toc.append('<li><a href="#heading-%s">Heading %s</a></li>' % (i, i))
+        content.append('<h%s id="heading-%s">Heading %s</h%s>' % (depth, i, i, depth))
+        content.append("<p>Some <em>text</em> with a <a href='#heading-0'>link</a>.</p>")
+        content.append("<table><tr><td>1</td><td>2</td></tr></table>")
+    return "<html><body><nav><ul>%s</ul></nav><main>%s</main></body></html>" % (
+        "".join(toc),
+        "".join(content),
+    )
+
+
+def make_project(
+    path,
+    n_pages: int = 100,
+    n_headings: int = 20,
+    distribution=DEPTH_DISTRIBUTION,
+    toc_depth: int = 3,
+    plugin_config: str = "",
+    seed: int = 0,
+) -> Path:
+    """
+    Write a MkDocs project using the enumerate-headings plugin.
+
+    Args:
+        path (Path): folder of the project
+        n_pages (int): number of pages
+        n_headings (int): number of headings per page
+        distribution (tuple): relative frequency of depths 1 to 6
+        toc_depth (int): deepest heading level listed in the table of contents
+        plugin_config (str): yaml options of the plugin, f.e. 'prescan: markdown'
+        seed (int): seed of the random generator
+
+    Returns:
+        Path: path of the mkdocs.yml file
+    """
+    path = Path(path)
+    docs = path / "docs"
+    docs.mkdir(parents=True, exist_ok=True)
+    for page in range(n_pages):
+        section = docs / ("section-%s" % (page // 10))
+        section.mkdir(exist_ok=True)
+        source = make_markdown(n_headings, distribution, seed=seed + page)
+        (section / ("page-%s.md" % page)).write_text(source, encoding="utf-8")
+
+    options = "".join("\n        %s" % line for line in plugin_config.splitlines() if line.strip())
+    config_file = path / "mkdocs.yml"
+    config_file.write_text(
+        "site_name: synthetic\n"
+        "use_directory_urls: false\n"
+        "markdown_extensions:\n"
+        "    - toc:\n"
+        "        toc_depth: %s\n"
+        "plugins:\n"
+        "    - enumerate-headings:%s\n" % (toc_depth, options or " {}"),
+        encoding="utf-8",
+    )
+    return config_file
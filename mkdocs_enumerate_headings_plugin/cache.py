@@ -0,0 +1,423 @@
+"""
+Module to persist results of the plugin between builds.
+"""
+import os
+import json
+import hashlib
+import logging
+from typing import Optional, Tuple
+
+try:
+    import importlib.metadata as importlib_metadata
+except ImportError:  # python < 3.8
+    try:
+        # Installed with mkdocs >= 1.4 on older pythons
+        import importlib_metadata
+    except ImportError:
+        importlib_metadata = None
+
+from mkdocs_enumerate_headings_plugin.heading import HeadingRecord
+from mkdocs_enumerate_headings_plugin.markdown_scan import has_includes
+
+logger = logging.getLogger("mkdocs.plugins")
+
+
+def markdown_fingerprint(config) -> str:
+    """
+    Hash the parts of the mkdocs configuration that influence which headings a page has.
+
+    Args:
+        config (dict): global mkdocs configuration object
+    Returns:
+        (str): hex digest
+    """
+    extensions = [
+        x if isinstance(x, str) else type(x).__name__
+        for x in config.get("markdown_extensions") or []
+    ]
+    markdown_config = json.dumps(
+        [extensions, config.get("mdx_configs") or {}], sort_keys=True, default=str
+    )
+    return hashlib.sha256(markdown_config.encode("utf-8")).hexdigest()
+
+
+def plugin_fingerprint(plugin_config, parser: str) -> str:
+    """
+    Hash the plugin configuration and version, that influence the enumerated output of a page.
+
+    Args:
+        plugin_config (dict): configuration of the plugin
+        parser (str): BeautifulSoup tree builder in use
+    Returns:
+        (str): hex digest
+    """
+    version = "unknown"
+    if importlib_metadata is not None:
+        try:
+            version = importlib_metadata.version("mkdocs-enumerate-headings-plugin")
+        except importlib_metadata.PackageNotFoundError:
+            pass
+    config = json.dumps([version, parser, dict(plugin_config)], sort_keys=True, default=str)
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+
+class H1Cache:
+    """
+    On-disk cache of the number of heading 1's per page.
+
+    Entries are keyed by the source path of a page, and are only valid
+    when the hash of the markdown source and markdown configuration is unchanged.
+    Entries of pages that were not looked up during a build are evicted on `save()`.
+    Pages that include other files are never cached, as the included files are not part of the hash.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, fingerprint: str) -> None:
+        """
+        Args:
+            path (str): path of the cache file
+            fingerprint (str): hash of everything besides the source that influences the count
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries = {}
+        self.seen = set()
+        self.changed = False
+
+    def load(self) -> None:
+        self.seen = set()
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(
+                "[enumerate-headings-plugin] Ignoring unreadable cache file %s" % self.path
+            )
+            return
+        if data.get("version") == self.VERSION:
+            self.entries = data.get("pages", {})
+
+    def save(self) -> None:
+        stale = set(self.entries) - self.seen
+        for key in stale:
+            del self.entries[key]
+        if not (self.changed or stale):
+            return
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "pages": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+    def get(self, key: str, source: str) -> Optional[int]:
+        """
+        Args:
+            key (str): path of the page source file
+            source (str): markdown source of the page
+        Returns:
+            (int): cached number of heading 1's, or None if unknown or outdated
+        """
+        self.seen.add(key)
+        if has_includes(source):
+            return None
+        entry = self.entries.get(key)
+        if entry and entry["hash"] == self._hash(source):
+            return entry["h1s"]
+        return None
+
+    def set(self, key: str, source: str, h1s: int) -> None:
+        self.seen.add(key)
+        if has_includes(source):
+            if self.entries.pop(key, None) is not None:
+                self.changed = True
+            return
+        self.entries[key] = {"hash": self._hash(source), "h1s": h1s}
+        self.changed = True
+
+    def keep(self, key: str) -> None:
+        """
+        Keep the entry of a page that was not looked up, because its source is known to be unchanged.
+
+        Args:
+            key (str): path of the page source file
+        """
+        self.seen.add(key)
+
+    def _hash(self, source: str) -> str:
+        digest = hashlib.sha256(self.fingerprint.encode("utf-8"))
+        digest.update(source.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    On-disk cache of enumerated pages.
+
+    Entries are content-addressed: the key is a hash of the incoming page output,
+    the chapter of the page and the plugin configuration, so an entry never gets outdated.
+    Every entry is a separate file, with the heading records of the page
+    as JSON on the first line, followed by the enumerated page.
+    The modification time of the file is the last time it was used. When the total size exceeds the cap,
+    the least recently used entries are evicted on `evict()`.
+    """
+
+    VERSION = 2
+
+    def __init__(self, directory: str, fingerprint: str, max_size: int) -> None:
+        """
+        Args:
+            directory (str): folder of the cache entries
+            fingerprint (str): hash of everything besides output and chapter that influences the result
+            max_size (int): maximum total size of the entries, in bytes
+        """
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, output: str, chapter: int) -> str:
+        digest = hashlib.sha256(
+            ("%s\0%s\0%s\0" % (self.VERSION, self.fingerprint, chapter)).encode("utf-8")
+        )
+        digest.update(output.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, list]]:
+        """
+        Args:
+            key (str): key from `key()`
+        Returns:
+            (tuple): enumerated page and its heading records, or None if not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8", errors="surrogatepass", newline="") as f:
+                records = [HeadingRecord(*record) for record in json.loads(f.readline())]
+                result = f.read()
+            # Mark the entry as recently used
+            os.utime(path)
+        except (OSError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result, records
+
+    def set(self, key: str, result: str, records: list) -> None:
+        """
+        Args:
+            key (str): key from `key()`
+            result (str): enumerated page
+            records (List[HeadingRecord]): headings of the page
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = "%s.%s.tmp" % (path, os.getpid())
+        with open(tmp_path, "w", encoding="utf-8", errors="surrogatepass", newline="") as f:
+            f.write(json.dumps(records) + "\n")
+            f.write(result)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache fits its maximum size.
+
+        Returns:
+            (int): number of evicted entries
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".html"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        evicted = 0
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            evicted += 1
+        return evicted
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".html")
+
+
+class ChapterTable:
+    """
+    On-disk record of the chapter and headings of every page, as written to the site directory by the previous build.
+
+    `mkdocs build --dirty` only rebuilds pages whose source changed. Comparing the chapters
+    of a new build with this table tells which other pages are outdated on disk.
+    The heading records of pages that are not rebuilt are taken from this table,
+    for the heading index and the search index.
+    The table is only valid for the same site directory and plugin configuration.
+    Every site directory has its own table file, so the builds of the languages
+    of a multi-language site do not overwrite each other's table.
+    """
+
+    VERSION = 2
+
+    def __init__(self, directory: str, fingerprint: str, site_dir: str) -> None:
+        """
+        Args:
+            directory (str): directory of the table files
+            fingerprint (str): hash of everything besides the chapter that influences the output
+            site_dir (str): site directory the pages are written to
+        """
+        self.fingerprint = fingerprint
+        self.site_dir = os.path.abspath(site_dir)
+        site_hash = hashlib.sha256(self.site_dir.encode("utf-8", errors="surrogatepass")).hexdigest()
+        self.path = os.path.join(directory, "chapters-%s.json" % site_hash[:16])
+
+    def load(self) -> Optional[Tuple[dict, dict]]:
+        """
+        Returns:
+            (tuple): chapter by page source path, and (url, heading records) by page source path,
+                or None if there is no valid table
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (
+            data.get("version") != self.VERSION
+            or data.get("fingerprint") != self.fingerprint
+            or data.get("site_dir") != self.site_dir
+        ):
+            return None
+        headings = {
+            src_path: (url, [HeadingRecord(*record) for record in records])
+            for src_path, (url, records) in data.get("headings", {}).items()
+        }
+        return data.get("pages", {}), headings
+
+    def save(self, chapters: dict, headings: dict, urls: dict) -> None:
+        """
+        Args:
+            chapters (dict): chapter by page source path
+            headings (dict): heading records by page source path, of the enumerated pages
+            urls (dict): url by page source path, of the enumerated pages
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "fingerprint": self.fingerprint,
+                    "site_dir": self.site_dir,
+                    "pages": chapters,
+                    "headings": {
+                        src_path: [urls[src_path], records]
+                        for src_path, records in headings.items()
+                    },
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+# Shared by all StructureCache instances, for the lifetime of the process
+_STRUCTURE_COUNTS = {}
+
+
+class StructureCache:
+    """
+    In-memory cache of the number of heading 1's per page, kept for the lifetime of the process.
+
+    i18n plugins (like mkdocs-static-i18n) build the site once per language, in the same process.
+    Pages with the same source, f.e. untranslated pages, are only counted once.
+    Languages can also be marked as having the same heading structure as the default language.
+    Their pages then reuse the count of the page with the same language neutral path,
+    without being read at all.
+    Pages that include other files are never cached, as the included files are not part of the hash.
+    """
+
+    def __init__(self, fingerprint: str, languages: list) -> None:
+        """
+        Args:
+            fingerprint (str): hash of the markdown configuration
+            languages (list): language codes with the same heading structure as the default language
+        """
+        self.fingerprint = fingerprint
+        self.languages = set(languages)
+
+    def neutral_path(self, src_path: str) -> str:
+        """
+        Strip the language from the path of a page, in both conventions of mkdocs-static-i18n:
+        a language folder (`fr/page.md`) and a language suffix (`page.fr.md`).
+
+        Args:
+            src_path (str): path of the page source, relative to the docs folder
+
+        Returns:
+            str: path of the page in the default language
+        """
+        parts = src_path.replace(os.sep, "/").split("/")
+        if len(parts) > 1 and parts[0] in self.languages:
+            parts = parts[1:]
+        root, ext = os.path.splitext(parts[-1])
+        base, dot, language = root.rpartition(".")
+        if dot and language in self.languages:
+            parts[-1] = base + ext
+        return "/".join(parts)
+
+    def get_path(self, src_path: str) -> Optional[int]:
+        """
+        Returns:
+            (int): number of heading 1's of the page with the same neutral path, or None if unknown
+                or if the page is not a translation in one of the languages
+        """
+        neutral_path = self.neutral_path(src_path)
+        if neutral_path == src_path.replace(os.sep, "/"):
+            # A page of the default language is always counted
+            return None
+        return _STRUCTURE_COUNTS.get((self.fingerprint, "path", neutral_path))
+
+    def get_source(self, source: str) -> Optional[int]:
+        """
+        Returns:
+            (int): number of heading 1's of a page with the same markdown source, or None if unknown
+        """
+        if has_includes(source):
+            return None
+        return _STRUCTURE_COUNTS.get((self.fingerprint, "source", self._hash(source)))
+
+    def set(self, src_path: str, source: str, h1s: int) -> None:
+        if has_includes(source):
+            return
+        _STRUCTURE_COUNTS[(self.fingerprint, "source", self._hash(source))] = h1s
+        if self.languages:
+            _STRUCTURE_COUNTS[(self.fingerprint, "path", self.neutral_path(src_path))] = h1s
+
+    @staticmethod
+    def clear() -> None:
+        """
+        Forget all counts, as if a new process started.
+        """
+        _STRUCTURE_COUNTS.clear()
+
+    @staticmethod
+    def _hash(source: str) -> str:
+        return hashlib.sha256(source.encode("utf-8", errors="surrogatepass")).hexdigest()
@@ -0,0 +1,208 @@
+"""
+Module to enumerate a written HTML file in chunks, with bounded memory.
+
+Like `StreamHTMLPage`, the page is tokenized with `html.parser.HTMLParser`
+and section numbers are inserted into the original HTML. But the page is never
+held in memory as a whole. The file is read twice, a chunk at a time:
+
+1. The first pass finds all headings, to determine the section numbering
+   and the numbering of the anchors that table of contents links refer to.
+2. The second pass inserts the numbering into the headings and links
+   as they pass, and writes the result incrementally.
+
+Memory is proportional to the chunk size plus the headings of the page.
+"""
+from html.parser import HTMLParser
+
+from mkdocs_enumerate_headings_plugin.heading import HeadingTable
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+from mkdocs_enumerate_headings_plugin.stream_html_page import (
+    HEADING_TAGS,
+    Tag,
+    heading_text,
+    link_text,
+)
+
+# Characters read at once
+CHUNK_SIZE = 1024 * 1024
+
+
+class ChunkScanner(HTMLParser):
+    """
+    Finds heading tags and links with a href in HTML that is fed in chunks.
+
+    Only the offsets of lines that have not been tokenized yet are kept,
+    to translate the (line, column) positions of HTMLParser to offsets.
+    """
+
+    def __init__(self, links: bool = False) -> None:
+        """
+        Args:
+            links (bool): also collect links with a href
+        """
+        super().__init__(convert_charrefs=True)
+        self.collect_links = links
+        # Tags found since the last `take_tags()`, in document order
+        self.tags = []
+        self.fed = 0
+        self._first_line = 1
+        self._line_offsets = [0]
+
+    def feed(self, data: str) -> None:
+        position = data.find("\n")
+        while position != -1:
+            self._line_offsets.append(self.fed + position + 1)
+            position = data.find("\n", position + 1)
+        self.fed += len(data)
+
+        super().feed(data)
+
+        # Everything before the current position is tokenized
+        line = self.getpos()[0]
+        del self._line_offsets[: line - self._first_line]
+        self._first_line = line
+
+    @property
+    def position(self) -> int:
+        """
+        Offset up to which the fed HTML is tokenized.
+        """
+        line, column = self.getpos()
+        return self._line_offsets[line - self._first_line] + column
+
+    def take_tags(self) -> list:
+        tags, self.tags = self.tags, []
+        return tags
+
+    def handle_starttag(self, tag, attrs, selfclosing=False):
+        if tag in HEADING_TAGS:
+            # Only the id is needed for the numbering
+            attrs = {name: value for name, value in attrs if name == "id"}
+            self.tags.append(self._make_tag(tag, attrs, selfclosing))
+        elif tag == "a" and self.collect_links:
+            attrs = dict(attrs)
+            if attrs.get("href") is not None:
+                self.tags.append(self._make_tag(tag, attrs, selfclosing))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, selfclosing=True)
+
+    def _make_tag(self, tag, attrs, selfclosing):
+        start = self.position
+        return Tag(tag, attrs, start, start + len(self.get_starttag_text()), selfclosing)
+
+
+def read_chunks(path: str, chunk_size: int):
+    """
+    Yields:
+        str: consecutive chunks of a utf-8 file, without newline translation
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class ChunkedHTMLPage(HTMLPage):
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Args:
+            path (str): path of the HTML file
+            chunk_size (int): number of characters read at once. Defaults to CHUNK_SIZE.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.fragment = False
+
+        scanner = ChunkScanner()
+        for chunk in read_chunks(path, chunk_size):
+            scanner.feed(chunk)
+        scanner.close()
+        self.headings = HeadingTable(scanner.take_tags(), None)
+        self._find_section_numbering()
+
+        self.add_span_element = None
+        self.toc_anchors = {}
+
+    def __str__(self):
+        # Only for small pages, f.e. in tests. Use `write()` to keep memory bounded.
+        parts = []
+        self.write(parts)
+        return "".join(parts)
+
+    def enumerate_headings(self, add_span_element: bool = True):
+        """
+        Adds section numbering to all headings, when the page is written.
+
+        Args:
+            add_span_element (bool): Wrap numbering with <span class='enumerate-heading-plugin'></span>. Defaults to True.
+        """
+        self.add_span_element = add_span_element
+
+    def enumerate_toc(self, depth: int = 0):
+        if depth < 1:
+            return
+        self.toc_anchors = self._anchor_index(depth)
+
+    def write(self, out) -> None:
+        """
+        Write the enumerated page.
+
+        Args:
+            out: file opened for writing, or a list to append the parts of the page to
+        """
+        self._write = out.append if isinstance(out, list) else out.write
+        scanner = ChunkScanner(links=bool(self.toc_anchors))
+        self._heading_index = 0
+        # Input that is not written yet starts at offset `_written`.
+        # The pending input starts at offset `_pending_start` (<= `_written`).
+        self._pending = ""
+        self._pending_start = 0
+        self._written = 0
+
+        for chunk in read_chunks(self.path, self.chunk_size):
+            # Drop the written input once per chunk, instead of once per tag
+            self._pending = self._pending[self._written - self._pending_start :] + chunk
+            self._pending_start = self._written
+            scanner.feed(chunk)
+            self._insert(scanner.take_tags())
+            # Tags found later start after the tokenized position
+            self._flush(scanner.position)
+
+        scanner.close()
+        self._insert(scanner.take_tags())
+        self._write(self._pending[self._written - self._pending_start :])
+        del self._write, self._pending
+
+    def _insert(self, tags) -> None:
+        for tag in tags:
+            if tag.name == "a":
+                text = link_text(self.headings, tag, self.toc_anchors)
+            elif self.add_span_element is not None:
+                text = heading_text(self.headings, self._heading_index, self.add_span_element)
+                self._heading_index += 1
+            else:
+                # Headings are not enumerated
+                continue
+            if not text:
+                continue
+            if tag.selfclosing:
+                self._flush(tag.start)
+                starttag = self._pending[
+                    tag.start - self._pending_start : tag.end - self._pending_start
+                ]
+                self._write(starttag[:-2].rstrip() + ">" + text + "</%s>" % tag.name)
+                self._written = tag.end
+            else:
+                self._flush(tag.end)
+                self._write(text)
+
+    def _flush(self, position: int) -> None:
+        # Write the input up to position
+        if position > self._written:
+            self._write(
+                self._pending[self._written - self._pending_start : position - self._pending_start]
+            )
+            self._written = position
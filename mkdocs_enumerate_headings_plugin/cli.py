@@ -0,0 +1,192 @@
+"""
+Command line tool to check the numbering of a MkDocs site without building it.
+
+The navigation is built with all configured plugins, like `mkdocs build` does.
+The markdown sources of the pages in the navigation are scanned for headings,
+in a pool of processes. Only pages the scanner cannot classify are rendered,
+and themes are never rendered. Every page that does not start with a heading 1
+is reported, together with the chapter number of every page.
+
+Usage:
+
+```bash
+enumerate-headings-validate --config-file mkdocs.yml
+```
+
+The exit code is 1 if any page does not start with a heading 1, so it can run
+as a pre-commit hook or in CI.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+from mkdocs.config import load_config
+from mkdocs.exceptions import ConfigurationError
+from mkdocs.structure.files import get_files
+from mkdocs.structure.nav import get_navigation
+
+from mkdocs_enumerate_headings_plugin import markdown_scan
+from mkdocs_enumerate_headings_plugin.page_enumerator import THEMES_INSERTING_H1
+
+PLUGIN_NAME = "enumerate-headings"
+
+
+def scan_pages(pages, scan_options, workers: int) -> list:
+    """
+    Find the heading depths of the markdown sources of pages.
+
+    Args:
+        pages (list): mkdocs.nav.Page instances, with their source read
+        scan_options (dict): keyword arguments for `markdown_scan.scan_headings()`,
+            or None if the markdown configuration is not supported by the scanner
+        workers (int): number of processes
+
+    Returns:
+        list: heading depths per page, or None for pages that cannot be classified
+    """
+    if scan_options is None:
+        return [None] * len(pages)
+    scan = functools.partial(markdown_scan.scan_headings, **scan_options)
+    sources = [page.markdown for page in pages]
+    if workers == 1 or len(sources) < 2:
+        return [scan(source) for source in sources]
+    chunksize = max(1, len(sources) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(scan, sources, chunksize=chunksize))
+
+
+def render_headings(page, config, files) -> list:
+    """
+    Returns:
+        list: depths of the headings in the content of a page, found by rendering its markdown
+    """
+    page.render(config, files)
+    soup = BeautifulSoup(page.content, "html.parser")
+    return [int(heading.name[1]) for heading in soup.find_all(re.compile("^h[1-6]$"))]
+
+
+def build_navigation(config, plugin):
+    """
+    Build the navigation the way `mkdocs build` does, including the changes of plugins
+    that alter the configuration, files or navigation (f.e. awesome-pages or monorepo).
+    The on_nav event of this plugin is not run, pages are scanned instead of rendered.
+
+    Args:
+        config (dict): global mkdocs configuration object
+        plugin (EnumerateHeadingsPlugin): instance of this plugin in the configuration
+
+    Returns:
+        tuple: the navigation and the files of the site
+    """
+    plugins = config["plugins"]
+    plugins.run_event("startup", command="build", dirty=False)
+    # Among others, this plugin compiles the include, exclude and restart globs
+    config = plugins.run_event("config", config)
+    plugins.run_event("pre_build", config=config)
+
+    files = get_files(config)
+    files.add_files_from_theme(config["theme"].get_env(), config)
+    files = plugins.run_event("files", files, config=config)
+
+    nav = get_navigation(files, config)
+    for method in plugins.events["nav"]:
+        if getattr(method, "__self__", None) is plugin:
+            continue
+        result = method(nav, config=config, files=files)
+        if result is not None:
+            nav = result
+    return nav, files
+
+
+def validate(config_file=None, workers=None, out=None) -> int:
+    """
+    Report the chapter of every page and every page that does not start with a heading 1.
+
+    Args:
+        config_file (str): path of mkdocs.yml. Defaults to mkdocs.yml in the working directory.
+        workers (int): number of processes to scan with. Defaults to the number of CPUs.
+        out (file): where to write the report to. Defaults to stdout.
+
+    Returns:
+        int: number of pages that do not start with a heading 1
+    """
+    start = time.perf_counter()
+    out = out or sys.stdout
+    config = load_config(config_file=config_file)
+    if PLUGIN_NAME not in config["plugins"]:
+        raise ValueError("The %s plugin is not enabled in %s" % (PLUGIN_NAME, config.config_file_path))
+
+    plugin = config["plugins"][PLUGIN_NAME]
+    nav, files = build_navigation(config, plugin)
+    scan_options = None
+    if markdown_scan.supports_config(config):
+        scan_options = markdown_scan.scan_options(config)
+
+    pages = [
+        page
+        for page in nav.pages
+        if plugin.included_pages(page.file.src_path)
+        and not plugin.excluded_pages(page.file.src_path)
+    ]
+    for page in pages:
+        page.read_source(config)
+
+    inserts_h1 = config["theme"].name in THEMES_INSERTING_H1
+    rendered = 0
+    problems = []
+    for page, depths in zip(pages, scan_pages(pages, scan_options, workers or os.cpu_count() or 1)):
+        if depths is None:
+            depths = render_headings(page, config, files)
+            rendered += 1
+        if inserts_h1 and 1 not in depths:
+            depths = [1] + depths
+        # Same as the plugin, a page always counts as at least one chapter
+        page.number_h1s = max(depths.count(1), 1)
+        if depths and depths[0] != 1:
+            problems.append((page, depths[0]))
+
+    for page, chapter in zip(pages, plugin._chapter_table(pages)):
+        out.write("%5s  %s\n" % (chapter, page.file.src_path))
+
+    for page, depth in problems:
+        out.write(
+            "ERROR: The first heading on '%s' is level %s, but should be level 1. Use '# <your title>'\n"
+            % (page.file.src_path, depth)
+        )
+
+    out.write(
+        "%s pages checked (%s rendered), %s problems in %.2fs\n"
+        % (len(pages), rendered, len(problems), time.perf_counter() - start)
+    )
+    config["plugins"].run_event("shutdown")
+    return len(problems)
+
+
+def main(argv=None) -> int:
+    argparser = argparse.ArgumentParser(
+        prog="enumerate-headings-validate",
+        description="Check that every page of a MkDocs site starts with a heading 1, and show the chapter of every page.",
+    )
+    argparser.add_argument(
+        "-f", "--config-file", default=None, help="Path of mkdocs.yml. Defaults to mkdocs.yml in the working directory."
+    )
+    argparser.add_argument(
+        "-w", "--workers", type=int, default=None, help="Number of processes to scan with. Defaults to the number of CPUs."
+    )
+    args = argparser.parse_args(argv)
+
+    try:
+        problems = validate(args.config_file, args.workers)
+    except (ValueError, ConfigurationError) as e:
+        sys.stderr.write("%s\n" % e)
+        return 2
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Module to enumerate pages after they are written to the site directory.
+
+In deferred mode `on_post_page` only records which pages to enumerate,
+and `on_post_build` rewrites the written files, optionally in a pool of processes.
+The pages are written by MkDocs in the same way the plugin would write them,
+so the result is the same as enumerating the pages in `on_post_page`.
+Files larger than `chunk_size` are enumerated in chunks, see `chunked_page`.
+"""
+import os
+from typing import NamedTuple, Optional
+
+from mkdocs_enumerate_headings_plugin.chunked_page import ChunkedHTMLPage
+
+
+class DeferredFile(NamedTuple):
+    src_path: str
+
+
+class DeferredPage(NamedTuple):
+    """
+    What is needed of a page to enumerate its written file.
+    Unlike mkdocs.nav.Page, it can be sent to another process.
+    """
+
+    src_path: str
+    dest_path: str
+    url: str
+    chapter: int
+    key: Optional[str] = None
+
+    @property
+    def file(self) -> DeferredFile:
+        return DeferredFile(self.src_path)
+
+
+def rewrite_page(enumerator, page: DeferredPage, keep_output: bool = False, chunk_size: int = 0):
+    """
+    Enumerate the written file of a page in place.
+
+    Args:
+        enumerator (PageEnumerator): enumerates the output of the page
+        page (DeferredPage): page to enumerate
+        keep_output (bool): return the enumerated output, f.e. to cache it
+        chunk_size (int): files larger than this number of bytes are enumerated
+            in chunks of this size, with bounded memory. 0 disables chunking.
+
+    Returns:
+        tuple: enumerated output (or None if not kept or chunked), whether the page passed validation,
+            and its heading records
+    """
+    if chunk_size and os.path.getsize(page.dest_path) > chunk_size:
+        return rewrite_page_chunked(enumerator, page, chunk_size)
+
+    # Read the whole file at once, pages are small compared to the work of enumerating them
+    with open(page.dest_path, "rb") as f:
+        data = f.read()
+    output = data.decode("utf-8")
+
+    # Only pages with headings are deferred, see `EnumerateHeadingsPlugin._enumerate_page()`
+    enumerated, valid, records = enumerator.enumerate_with_headings(output, page)
+
+    if enumerated != output:
+        # Encoded the same way MkDocs writes pages
+        with open(page.dest_path, "wb") as f:
+            f.write(enumerated.encode("utf-8", errors="xmlcharrefreplace"))
+
+    return (enumerated if keep_output else None), valid, records
+
+
+def rewrite_page_chunked(enumerator, page: DeferredPage, chunk_size: int):
+    """
+    Enumerate the written file of a page in place, without reading it into memory as a whole.
+    The full page is enumerated, like with `engine: stream`.
+
+    Args:
+        enumerator (PageEnumerator): settings to enumerate the page with
+        page (DeferredPage): page to enumerate
+        chunk_size (int): number of characters read at once
+
+    Returns:
+        tuple: None, whether the page passed validation, and its heading records
+    """
+    htmlpage = ChunkedHTMLPage(page.dest_path, chunk_size)
+    valid = htmlpage.validate(page=page, plugin_config=enumerator.plugin_config)
+    if len(htmlpage.headings) == 0:
+        return None, valid, []
+
+    htmlpage.set_page_chapter(page.chapter)
+    htmlpage.enumerate_headings()
+    htmlpage.enumerate_toc(depth=enumerator.toc_depth)
+
+    tmp_path = "%s.%s.tmp" % (page.dest_path, os.getpid())
+    with open(tmp_path, "w", encoding="utf-8", errors="xmlcharrefreplace", newline="") as f:
+        htmlpage.write(f)
+    os.replace(tmp_path, page.dest_path)
+    return None, valid, htmlpage.headings.records()
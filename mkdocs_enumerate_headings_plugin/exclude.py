@@ -3,6 +3,7 @@ Module to assist exclude certain files being processed by plugin.
 Inspired by https://github.com/apenwarr/mkdocs-exclude
 """
 import os
+import re
 import fnmatch
 from typing import List
 
@@ -63,3 +64,41 @@ def matches_nix_path(src_path: str, globs: List[str]) -> bool:
     fixed_path = src_path.replace(os.sep, "/")
 
     return any(fnmatch.fnmatch(fixed_path, glob) for glob in globs)
+
+
+class GlobMatcher:
+    """
+    Matches src_paths against a list of globs, like `matches_nix_path()`.
+
+    All globs are compiled into a single regular expression once,
+    and the result per src_path is memoized, so that matching
+    many pages against many globs has a near-constant cost per page.
+    """
+
+    def __init__(self, globs: List[str]) -> None:
+        """
+        Args:
+            globs (list): list of globs of file paths
+        """
+        assert isinstance(globs, list)
+        self.globs = globs
+        # fnmatch.fnmatch() normalizes the case of both path and pattern on Windows
+        patterns = [fnmatch.translate(os.path.normcase(glob)) for glob in globs]
+        self.regex = re.compile("|".join(patterns)) if patterns else None
+        self.cache = {}
+
+    def __call__(self, src_path: str) -> bool:
+        """
+        Args:
+            src_path (src): Path of file
+        Returns:
+            (bool): whether src_path matches one of the globs
+        """
+        matched = self.cache.get(src_path)
+        if matched is None:
+            assert isinstance(src_path, str)
+            # See matches_nix_path() on the conversion of separators
+            fixed_path = os.path.normcase(src_path.replace(os.sep, "/"))
+            matched = self.regex is not None and self.regex.match(fixed_path) is not None
+            self.cache[src_path] = matched
+        return matched
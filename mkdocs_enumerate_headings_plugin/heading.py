@@ -1,61 +1,204 @@
-class Heading:
-    def __init__(self, element, soup) -> None:
+from array import array
+from typing import List, NamedTuple, Optional
+
+HEADING_DEPTHS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+
+class HeadingRecord(NamedTuple):
+    """
+    Numbering of a heading, without any reference to the parsed page.
+    """
+
+    # id of the heading element, or None if it has none
+    anchor: Optional[str]
+    depth: int
+    # Section number string, f.e. "1.2"
+    section: str
+
+
+class HeadingTable:
+    """
+    All headings on a page, stored column-wise.
+
+    Depths and anchorlinks are resolved once at construction.
+    Section numbers of all headings share one contiguous buffer,
+    with 6 numbers (h1-h6) per heading.
+    Indexing or iterating the table returns lightweight `Heading` views.
+    """
+
+    __slots__ = ("elements", "soup", "depths", "anchors", "numbering")
+
+    def __init__(self, elements, soup) -> None:
         """
         Args:
-            element (bs4.element.Tag): BeautifulSoup Tag
-            soup: BeautifulSoup class instance 
+            elements (List[bs4.element.Tag]): BeautifulSoup Tags of h1-h6 headings
+            soup: BeautifulSoup class instance
         """
-        self.heading = element
+        self.elements = list(elements)
         self.soup = soup
 
+        self.depths = array("B")
+        self.anchors = []
+        for element in self.elements:
+            assert element.name in HEADING_DEPTHS
+            self.depths.append(HEADING_DEPTHS[element.name])
+            anchor = element.get("id")
+            self.anchors.append("#" + anchor if anchor else None)
+
         # Placeholder for h1-h6 section numbers that will be filled later
-        self.section_numbering = [0, 0, 0, 0, 0, 0]
+        self.numbering = array("I", bytes(4 * 6 * len(self.elements)))
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __getitem__(self, index: int) -> "Heading":
+        if index < 0:
+            index += len(self.elements)
+        if not 0 <= index < len(self.elements):
+            raise IndexError("heading index out of range")
+        return Heading(None, table=self, index=index)
+
+    def __iter__(self):
+        for index in range(len(self.elements)):
+            yield Heading(None, table=self, index=index)
+
+    def set_chapter(self, chapter: int) -> None:
+        # Chapter is the h1 section number.
+        # Note that chapter numbers should always start at either 0 or 1
+        # And then increment.
+        numbering = self.numbering
+        for offset in range(0, len(numbering), 6):
+            line_chapter = numbering[offset]
+            if line_chapter == 0:
+                numbering[offset] = chapter
+            else:
+                numbering[offset] = line_chapter - 1 + chapter
+
+    def records(self) -> List[HeadingRecord]:
+        """
+        Returns:
+            List[HeadingRecord]: anchor, depth and section number string of every heading
+        """
+        return [
+            HeadingRecord(anchor[1:] if anchor else None, depth, self.section_number_string(index))
+            for index, (anchor, depth) in enumerate(zip(self.anchors, self.depths))
+        ]
+
+    def section_number_string(self, index: int) -> str:
+        """
+        Translate section numbering of a heading to a string
+
+        Examples:
+            # Basic heading
+            [1, 0, 0, 0, 0, 0]
+            #> "1."
+            # Subheading
+            [2, 1, 0, 0, 0, 0]
+            #> "2.1"
+        """
+        numbers = self.numbering[6 * index : 6 * index + 6]
+        if not any(numbers):
+            raise AssertionError(
+                "[enumerate-heading-plugin] Heading '%s' has not been assigned any section numbering"
+                % self.elements[index].string
+            )
+
+        # Remove any trailing zeros
+        end = 6
+        while numbers[end - 1] == 0:
+            end -= 1
+
+        # Join to string
+        heading_string = ".".join([str(x) for x in numbers[:end]])
+
+        # Add a trailing dot to level 1 headings
+        # For example "1" should be "1."
+        if end == 1:
+            heading_string += "."
+
+        return heading_string
+
+
+class Heading:
+    """
+    View on a single heading of a `HeadingTable`.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, element, soup=None, table: HeadingTable = None, index: int = 0) -> None:
+        """
+        Args:
+            element (bs4.element.Tag): BeautifulSoup Tag. Only used without table.
+            soup: BeautifulSoup class instance. Only used without table.
+            table (HeadingTable): table the heading is part of
+            index (int): position of the heading in the table
+        """
+        if table is None:
+            table = HeadingTable([element], soup)
+        self.table = table
+        self.index = index
 
     @property
-    def depth(self):
+    def heading(self):
+        return self.table.elements[self.index]
+
+    @property
+    def soup(self):
+        return self.table.soup
+
+    @property
+    def depth(self) -> int:
         """
         Translates h1-h6 strings to integer
         """
-        assert self.heading.name in ["h1", "h2", "h3", "h4", "h5", "h6"]
-        return int(self.heading.name[1])
+        return self.table.depths[self.index]
 
     @property
     def anchorlink(self) -> str:
         """Returns HTML anchorlink
-        
+
         F.e. a tag with <h1 id="the-homepage">The Homepage</h1>
         would have anchor link "#the-homepage"
 
         Returns:
             str: anchorlink
         """
-        if self.heading.get("id"):
-            return "#" + self.heading.get("id")
-        else:
-            return None
+        return self.table.anchors[self.index]
+
+    @property
+    def section_numbering(self):
+        offset = 6 * self.index
+        return self.table.numbering[offset : offset + 6].tolist()
+
+    @section_numbering.setter
+    def section_numbering(self, numbers):
+        offset = 6 * self.index
+        self.table.numbering[offset : offset + 6] = array("I", numbers)
 
     def set_section_number(self, section_number: int, depth: int):
-        self.section_numbering[depth - 1] = section_number
+        self.table.numbering[6 * self.index + depth - 1] = section_number
 
     def get_section_number(self, depth: int):
-        return self.section_numbering[depth - 1]
+        return self.table.numbering[6 * self.index + depth - 1]
 
     def set_chapter(self, chapter):
         # Chapter is the h1 section number.
         # Note that chapter numbers should always start at either 0 or 1
         # And then increment.
-        line_chapter = self.section_numbering[0]
+        offset = 6 * self.index
+        line_chapter = self.table.numbering[offset]
         if line_chapter == 0:
             new_chapter = chapter
         else:
             new_chapter = line_chapter - 1 + chapter
 
-        self.section_numbering[0] = new_chapter
+        self.table.numbering[offset] = new_chapter
 
     def section_number_string(self):
         """
         Translate section numbering to a string
-        
+
         Examples:
             # Basic heading
             [1, 0, 0, 0, 0, 0]
@@ -63,28 +206,7 @@ class Heading:
             # Subheading
             [2, 1, 0, 0, 0, 0]
         """
-        if self.section_numbering == [0, 0, 0, 0, 0, 0]:
-            raise AssertionError(
-                "[enumerate-heading-plugin] Heading '%s' has not been assigned any section numbering"
-                % self.heading.string
-            )
-
-        numbers = self.section_numbering
-
-        # Remove any trailing zeros
-        while numbers[-1] == 0:
-            del numbers[-1]
-
-        # Join to string
-        heading_string = [str(x) for x in numbers]
-        heading_string = ".".join(heading_string)
-
-        # Add a trailing dot to level 1 headings
-        # For example "1" should be "1."
-        if "." not in heading_string:
-            heading_string += "."
-
-        return heading_string
+        return self.table.section_number_string(self.index)
 
     def enumerate(self, add_span_element=False):
         section_string = self.section_number_string()
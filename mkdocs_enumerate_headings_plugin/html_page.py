@@ -1,18 +1,61 @@
 import re
 import logging
+import importlib.util
+from array import array
 from bs4 import BeautifulSoup
 
-from mkdocs_enumerate_headings_plugin.heading import Heading
+from mkdocs_enumerate_headings_plugin.heading import HeadingTable
 
+# BeautifulSoup tree builders, and the package they require
+PARSERS = {
+    "html.parser": None,
+    "lxml": "lxml",
+    "html5lib": "html5lib",
+}
+
+
+def resolve_parser(parser: str) -> str:
+    """
+    Determine the BeautifulSoup tree builder to use.
+
+    Args:
+        parser (str): One of 'auto', 'html.parser', 'lxml' or 'html5lib'.
+            'auto' uses lxml when it is installed.
+
+    Returns:
+        str: name of an installed tree builder
+    """
+    if parser == "auto":
+        parser = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+    package = PARSERS[parser]
+    if package and not importlib.util.find_spec(package):
+        logging.warning(
+            "[enumerate_headings_plugin]: parser '%s' is not installed (pip install %s), falling back to 'html.parser'"
+            % (parser, package)
+        )
+        parser = "html.parser"
+
+    return parser
 
-class HTMLPage:
-    def __init__(self, content: str) -> None:
 
-        self.soup = BeautifulSoup(content, "html.parser")
+class HTMLPage:
+    def __init__(self, content: str, parser: str = "html.parser", fragment: bool = False) -> None:
+        """
+        Args:
+            content (str): HTML page
+            parser (str): BeautifulSoup tree builder. Defaults to 'html.parser'.
+            fragment (bool): Content is part of a page. Defaults to False.
+        """
+        self.soup = BeautifulSoup(content, parser)
+        self.fragment = fragment
         self.headings = self._find_headings()
         self._find_section_numbering()
 
     def __str__(self):
+        # lxml and html5lib wrap a fragment in <html><body>
+        if self.fragment and self.soup.body is not None:
+            return self.soup.body.decode_contents()
         return str(self.soup)
 
     def enumerate_headings(self, add_span_element: bool = True):
@@ -26,19 +69,33 @@ class HTMLPage:
             heading.enumerate(add_span_element=add_span_element)
 
     def enumerate_toc(self, depth: int = 0):
-        links = self.soup.find_all("a", href=True)
-
-        for heading in self.headings:
-            for link in links:
-                if "headerlink" in link.get("class", []):
-                    # This avoids enumerating permalinks
-                    continue
-                if link.get("href") == heading.anchorlink and heading.depth <= depth:
-                    link.insert(0, " ")
-                    link.insert(0, heading.section_number_string())
+        if depth < 1:
+            return
+
+        anchors = self._anchor_index(depth)
+        for link in self.soup.find_all("a", href=True):
+            if "headerlink" in link.get("class", []):
+                # This avoids enumerating permalinks
+                continue
+            # Multiple headings can share an anchor, the number of the last heading ends up first
+            for index in anchors.get(link.get("href"), []):
+                link.insert(0, " ")
+                link.insert(0, self.headings.section_number_string(index))
+
+    def _anchor_index(self, depth: int):
+        """
+        Returns:
+            Dict[str, List[int]]: index of headings up to depth, by their anchorlink, in page order
+        """
+        anchors = {}
+        table = self.headings
+        for index, anchor in enumerate(table.anchors):
+            if anchor and table.depths[index] <= depth:
+                anchors.setdefault(anchor, []).append(index)
+        return anchors
 
     def set_page_chapter(self, chapter: int) -> None:
-        [h.set_chapter(chapter) for h in self.headings]
+        self.headings.set_chapter(chapter)
 
     def validate(self, page, plugin_config):
 
@@ -64,39 +121,25 @@ class HTMLPage:
     def _find_headings(self):
         """
         Returns:
-            List[Heading]: list of Heading class instances
+            HeadingTable: all headings on the page
         """
-        return [
-            Heading(x, self.soup) for x in self.soup.find_all(re.compile("^h[1-6]$"))
-        ]
+        return HeadingTable(self.soup.find_all(re.compile("^h[1-6]$")), self.soup)
 
     def _find_section_numbering(self):
         """
         This function contains the core algorithm for determining
         the section numbering for each heading.
-        
-        The main trick is that we look for each heading depth separately
-        at the list of lines with headings.
-        """
 
-        # Look at each heading level separately
-        for depth in range(1, 7):
-            for i, heading in enumerate(self.headings):
-                if i == 0:
-                    # First heading line. Start counting at 1 only if heading is right depth
-                    heading.set_section_number(int(heading.depth == depth), depth)
-                elif heading.depth < depth:
-                    # The heading depth is higher than current level, restart counter
-                    heading.set_section_number(0, depth)
-                elif heading.depth == depth:
-                    # New heading at current depth level, increment counter
-                    previous_section_number = self.headings[i - 1].get_section_number(
-                        depth
-                    )
-                    heading.set_section_number(previous_section_number + 1, depth)
-                else:
-                    # No change, keep previous section number
-                    previous_section_number = self.headings[i - 1].get_section_number(
-                        depth
-                    )
-                    heading.set_section_number(previous_section_number, depth)
+        We walk the headings once, keeping a counter per depth.
+        A heading increments the counter of its own depth,
+        and restarts the counters of all deeper levels.
+        Levels that are skipped keep a 0 (f.e. 1.0.1),
+        and levels above the first heading on a page start at 0 (f.e. 0.1).
+        """
+        counters = [0, 0, 0, 0, 0, 0]
+        numbering = []
+        for depth in self.headings.depths:
+            counters[depth - 1] += 1
+            counters[depth:] = [0] * (6 - depth)
+            numbering.extend(counters)
+        self.headings.numbering = array("I", numbering)
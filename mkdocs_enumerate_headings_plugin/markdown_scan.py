@@ -0,0 +1,294 @@
+"""
+Module to find headings directly in the markdown source of a page,
+without running the full markdown conversion.
+
+The scanner mimics how Python-Markdown recognizes ATX (`# title`)
+and setext (`title` followed by `===`) headings, and skips fenced code blocks.
+Front matter is not part of the scan: MkDocs strips it in `page.read_source()`,
+and a `title:` never adds a heading to the content.
+Whenever the source contains a construct where the result depends
+on the markdown conversion (raw HTML, indented headings, snippets, math blocks),
+the page is reported as unclassifiable and should be rendered instead.
+"""
+import re
+from typing import List, Optional
+
+from markdown.util import BLOCK_LEVEL_ELEMENTS
+
+# Markdown extensions that do not create headings from non-heading syntax,
+# and do not hide heading syntax in ways the scanner does not understand.
+SCANNABLE_EXTENSIONS = {
+    "abbr",
+    "admonition",
+    "attr_list",
+    "codehilite",
+    "def_list",
+    "extra",
+    "fenced_code",
+    "footnotes",
+    "legacy_attrs",
+    "legacy_em",
+    "md_in_html",
+    "meta",
+    "nl2br",
+    "sane_lists",
+    "smarty",
+    "tables",
+    "toc",
+    "wikilinks",
+    "pymdownx.arithmatex",
+    "pymdownx.betterem",
+    "pymdownx.caret",
+    "pymdownx.details",
+    "pymdownx.emoji",
+    "pymdownx.highlight",
+    "pymdownx.inlinehilite",
+    "pymdownx.keys",
+    "pymdownx.magiclink",
+    "pymdownx.mark",
+    "pymdownx.smartsymbols",
+    "pymdownx.snippets",
+    "pymdownx.superfences",
+    "pymdownx.tabbed",
+    "pymdownx.tasklist",
+    "pymdownx.tilde",
+}
+
+QUOTE_RE = re.compile(r"^(?:[ ]{0,3}>[ ]?)+")
+HR_RE = re.compile(r"^[ ]{0,3}((-+[ ]{0,2}){3,}|(_+[ ]{0,2}){3,}|(\*+[ ]{0,2}){3,})[ ]*$")
+# Lists and block syntax of extensions (admonitions, details, tabs, footnotes,
+# abbreviations, definitions) that take precedence over setext headings
+BLOCK_SYNTAX_RE = re.compile(r"^(([*+-]|\d+[.)]|!!!|\?\?\?\+?|===|:)([ ]|$)|\*\[|\[\^)")
+# Heading syntax, possibly behind list, definition or footnote markers.
+# Python-Markdown renders headings at the start of list items, definitions and footnotes.
+NESTED_HEADING_RE = re.compile(r"^[ ]*(?:(?:[*+-]|\d+[.)]|:)[ ]+|\[\^[^\]]*\]:[ ]*)*#")
+SETEXT_RE = re.compile(r"^(=+|-+)[ ]*$")
+FENCE_RE = re.compile(r"^(?P<indent>[ \t]*)(?P<fence>`{3,}|~{3,})(?P<info>.*)$")
+# Info string accepted by the builtin fenced_code extension
+FENCE_INFO_RE = re.compile(
+    r"^[ ]*(\{[^\n]*\}|\.?[\w#.+-]*[ ]*(hl_lines=(\"|').*?\3[ ]*)?)$"
+)
+HTML_BLOCK_RE = re.compile(r"^[ ]{0,3}<(?:[!?]|/?(?P<tag>[a-zA-Z][a-zA-Z0-9-]*))")
+RAW_HEADING_RE = re.compile(r"<h[1-6][\s>/]", re.IGNORECASE)
+# Start of a pymdownx.arithmatex block, which hides heading syntax from the markdown parser
+MATH_BLOCK_RE = re.compile(r"^[ ]*(\$\$|\\\[|\\begin\{)")
+INCLUDE_MARKERS = ("--8<--", "{!")
+
+
+def _extension_name(extension) -> Optional[str]:
+    if not isinstance(extension, str):
+        return None
+    if extension.startswith("markdown.extensions."):
+        return extension[len("markdown.extensions.") :]
+    return extension
+
+
+def has_includes(markdown: str) -> bool:
+    """
+    Determine if a markdown source includes other files, f.e. with pymdownx.snippets.
+    The headings of such a page also depend on the included files.
+
+    Args:
+        markdown (str): markdown source of a page
+    Returns:
+        (bool): whether the source contains include syntax
+    """
+    return any(marker in markdown for marker in INCLUDE_MARKERS)
+
+
+def supports_config(config) -> bool:
+    """
+    Determine if the markdown sources of a site can be scanned,
+    given its markdown extensions.
+
+    Args:
+        config (dict): global mkdocs configuration object
+    Returns:
+        (bool): whether the scanner understands all markdown extensions
+    """
+    mdx_configs = config.get("mdx_configs") or {}
+    for extension in config.get("markdown_extensions") or []:
+        name = _extension_name(extension)
+        if name not in SCANNABLE_EXTENSIONS:
+            return False
+    snippets_config = mdx_configs.get("pymdownx.snippets") or {}
+    if snippets_config.get("auto_append"):
+        return False
+    return True
+
+
+def scan_options(config) -> dict:
+    """
+    Determine the keyword arguments for `scan_headings()` from the markdown configuration.
+
+    Args:
+        config (dict): global mkdocs configuration object
+    Returns:
+        (dict): with the toc `baselevel` and whether `superfences` is enabled
+    """
+    mdx_configs = config.get("mdx_configs") or {}
+    toc_config = mdx_configs.get("toc") or mdx_configs.get("markdown.extensions.toc") or {}
+    extensions = [_extension_name(x) for x in config.get("markdown_extensions") or []]
+    return {
+        "baselevel": int(toc_config.get("baselevel", 1)),
+        "superfences": "pymdownx.superfences" in extensions,
+    }
+
+
+def scan_headings(
+    markdown: str, baselevel: int = 1, superfences: bool = False
+) -> Optional[List[int]]:
+    """
+    Find the depth of every heading in a markdown source, in order of appearance.
+
+    Args:
+        markdown (str): markdown source of a page, without meta-data
+        baselevel (int): baselevel of the toc extension. Defaults to 1.
+        superfences (bool): whether pymdownx.superfences is enabled. Defaults to False.
+    Returns:
+        (list): depths (1-6) of all headings, or None if the page cannot be classified
+    """
+    if has_includes(markdown):
+        return None
+
+    depths = []
+    lines = markdown.expandtabs(4).splitlines()
+    # Python-Markdown only detects setext headings on the first two lines
+    # of a block. A new block starts after a blank line, heading or horizontal rule.
+    block_start = True
+    # Whether a setext underline on the next line would be ambiguous
+    ambiguous = False
+    table = False
+    # Whether the block contains syntax that can change where sub-blocks start
+    unsure = False
+    code = False
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+
+        if not line.strip():
+            block_start, ambiguous, table, unsure = True, False, False, False
+            continue
+
+        if MATH_BLOCK_RE.match(line):
+            return None
+
+        if code:
+            if line.startswith("    "):
+                # Could also be the content of a preceding list item, admonition, tab or definition
+                if NESTED_HEADING_RE.match(line) or SETEXT_RE.match(line.lstrip(" ")):
+                    return None
+                continue
+            # The first line that is not indented ends an indented code block
+            code, block_start, unsure = False, True, True
+
+        next_line = lines[i] if i < len(lines) else ""
+        underline = SETEXT_RE.match(next_line)
+
+        fence = FENCE_RE.match(line)
+        indent = fence.group("indent") if fence else ""
+        if fence and (superfences or not indent):
+            closing = _find_closing_fence(lines, i, fence.group("fence"), indent)
+            if closing is None:
+                return None
+            if superfences and not indent and not (i == 1 or not lines[i - 2].strip()):
+                return None
+            if not superfences and not FENCE_INFO_RE.match(fence.group("info")):
+                return None
+            i = closing + 1
+            if i < len(lines) and lines[i].strip():
+                return None
+            continue
+
+        if RAW_HEADING_RE.search(line) or _is_html_block(line):
+            return None
+
+        if (SETEXT_RE.match(line) and (ambiguous or unsure)) or (unsure and HR_RE.match(line)):
+            return None
+
+        if block_start and line.startswith("    "):
+            if (
+                NESTED_HEADING_RE.match(line)
+                or SETEXT_RE.match(line.lstrip(" "))
+                or SETEXT_RE.match(next_line.lstrip(" "))
+            ):
+                return None
+            code = True
+            continue
+
+        if block_start and underline and not line.startswith("#"):
+            if unsure or "|" in line or BLOCK_SYNTAX_RE.match(line):
+                return None
+            depths.append(1 if next_line.startswith("=") else 2)
+            i += 1
+            block_start, ambiguous = True, False
+            continue
+
+        quote = QUOTE_RE.match(line)
+        rest = line[quote.end() :] if quote else line
+        if quote and (not rest.strip() or FENCE_RE.match(rest) or SETEXT_RE.match(rest)):
+            return None
+        unsure = unsure or bool(quote) or bool(BLOCK_SYNTAX_RE.match(rest))
+
+        if not rest.startswith("#") and NESTED_HEADING_RE.match(rest):
+            # A heading inside a list item, definition or footnote
+            return None
+        if rest.startswith("#"):
+            if unsure:
+                return None
+            depths.append(min(len(rest) - len(rest.lstrip("#")), 6))
+            block_start, ambiguous = True, unsure
+        elif HR_RE.match(line):
+            block_start, ambiguous = True, False
+        elif rest[0] == " ":
+            stripped = rest.lstrip(" ")
+            if SETEXT_RE.match(stripped):
+                return None
+            # Indented lines can be code blocks or list content
+            block_start, ambiguous = False, True
+        else:
+            table = table or (block_start and "|" in rest)
+            unsure = unsure or table
+            ambiguous = unsure
+            block_start = False
+
+    return [min(depth + baselevel - 1, 6) for depth in depths]
+
+
+def count_h1s(
+    markdown: str, baselevel: int = 1, superfences: bool = False
+) -> Optional[int]:
+    """
+    Count the number of heading 1's in a markdown source.
+
+    Args:
+        markdown (str): markdown source of a page, without meta-data
+        baselevel (int): baselevel of the toc extension. Defaults to 1.
+        superfences (bool): whether pymdownx.superfences is enabled. Defaults to False.
+    Returns:
+        (int): number of heading 1's, or None if the page cannot be classified
+    """
+    depths = scan_headings(markdown, baselevel=baselevel, superfences=superfences)
+    if depths is None:
+        return None
+    return depths.count(1)
+
+
+def _is_html_block(line):
+    match = HTML_BLOCK_RE.match(line)
+    if not match:
+        return False
+    tag = match.group("tag")
+    return tag is None or tag.lower() in BLOCK_LEVEL_ELEMENTS
+
+
+def _find_closing_fence(lines, start, fence, indent):
+    for j in range(start, len(lines)):
+        line = lines[j]
+        if line.rstrip(" ") == indent + fence:
+            return j
+        if line.strip() and not line.startswith(indent):
+            # Nested fences must stay within their indentation
+            return None
+    return None
@@ -0,0 +1,274 @@
+"""
+Module with the enumeration of the HTML output of a single page.
+
+`PageEnumerator` holds everything needed to enumerate a page besides the page itself,
+and can be pickled to enumerate pages in other processes.
+"""
+import re
+import functools
+
+from mkdocs_enumerate_headings_plugin import regions
+from mkdocs_enumerate_headings_plugin.profiler import NullProfiler
+
+# Start tag of a heading, may also match headings in comments or scripts
+HEADING_TAG_RE = re.compile(r"<h[1-6][\s/>]", re.IGNORECASE)
+
+# Themes that insert the page title as a heading 1 when the content has none
+THEMES_INSERTING_H1 = {"material"}
+
+
+class PageEnumerator:
+    def __init__(
+        self,
+        engine,
+        parser: str,
+        toc_depth: int,
+        strict: bool,
+        region_selectors=None,
+        profiler=None,
+        keep_soup: bool = False,
+    ) -> None:
+        """
+        Args:
+            engine (type): HTMLPage or StreamHTMLPage
+            parser (str): BeautifulSoup tree builder
+            toc_depth (int): Up to which level the table of contents is enumerated
+            strict (bool): Raise an error for pages that do not start with a heading 1
+            region_selectors (tuple): content and toc selectors, or None to enumerate full pages
+            profiler (Profiler): to time the parts of the enumeration. Defaults to no profiling.
+            keep_soup (bool): keep the BeautifulSoup tree of the last page enumerated as a full page
+                in `last_soup`. Defaults to False.
+        """
+        self.engine = engine
+        self.parser = parser
+        self.toc_depth = toc_depth
+        self.plugin_config = {"strict": strict}
+        self.region_selectors = region_selectors
+        self.profiler = profiler or NullProfiler()
+        self.keep_soup = keep_soup
+        self.last_soup = None
+
+    def __getstate__(self):
+        # Timings made in another process would be lost
+        state = self.__dict__.copy()
+        state["profiler"] = NullProfiler()
+        state["keep_soup"] = False
+        state["last_soup"] = None
+        return state
+
+    def enumerate(self, output: str, page):
+        """
+        Enumerate the headings and links of a page.
+
+        Args:
+            output (str): output of rendered template as string
+            page (Page): mkdocs.nav.Page instance, or any object with `chapter` and `file.src_path`
+
+        Returns:
+            tuple: enumerated output, whether the page passed validation, and its heading records.
+                Pages without headings are returned unchanged, without parsing them.
+        """
+        if not self.has_headings(output):
+            return self.skip(output, page)
+        return self.enumerate_with_headings(output, page)
+
+    def enumerate_with_headings(self, output: str, page):
+        """
+        Enumerate the headings and links of a page, for which `has_headings()` is known to be True.
+
+        Args:
+            output (str): output of rendered template as string
+            page (Page): mkdocs.nav.Page instance, or any object with `chapter` and `file.src_path`
+
+        Returns:
+            tuple: enumerated output, whether the page passed validation, and its heading records
+        """
+        enumerated = None
+        if self.region_selectors is not None:
+            enumerated = self._enumerate_regions(output, page)
+        if enumerated is None:
+            enumerated = self._enumerate_html(output, page)
+        return enumerated
+
+    def enumerate_content(self, content: str, page):
+        """
+        Enumerate the headings and links of the content of a page, before it is themed.
+
+        Args:
+            content (str): HTML rendered from the markdown of the page
+            page (Page): mkdocs.nav.Page instance
+
+        Returns:
+            tuple: enumerated content, whether the page passed validation, and its heading records
+        """
+        if not self.has_headings(content):
+            return self.skip(content, page, hook="on_page_content")
+        return self._enumerate_html(content, page, fragment=True, hook="on_page_content")
+
+    def has_headings(self, output: str, start: int = 0, end: int = None) -> bool:
+        """
+        Cheap check on the raw output whether there might be headings to enumerate.
+
+        Args:
+            output (str): output of rendered template as string
+            start (int): start of the part of the output to check
+            end (int): end of the part of the output to check. Defaults to the end of the output.
+
+        Returns:
+            bool: False if there are certainly no headings
+        """
+        return HEADING_TAG_RE.search(output, start, len(output) if end is None else end) is not None
+
+    def skip(self, output: str, page, hook: str = "on_post_page"):
+        """
+        Leave a page without headings as is, use when `has_headings()` is False.
+
+        Args:
+            output (str): output of rendered template as string
+            page (Page): mkdocs.nav.Page instance
+            hook (str): name of the hook the skipped page is counted for
+
+        Returns:
+            tuple: the output unchanged, True and no heading records, like `enumerate()`
+        """
+        # Without headings, there is no numbering and no table of contents links to enumerate
+        self.profiler.count("%s.skipped" % hook)
+        return output, True, []
+
+    def _enumerate_html(self, output, page, fragment=False, hook="on_post_page"):
+        """
+        Enumerate all headings and links of a page, or of the content of a page.
+
+        Args:
+            output (str): output of rendered template as string
+            page (Page): mkdocs.nav.Page instance
+            fragment (bool): output is part of a page
+            hook (str): name of the hook the timings are attributed to
+
+        Returns:
+            tuple: enumerated output, whether the page passed validation, and its heading records
+        """
+        timer = functools.partial(self.profiler.timer, page=page.file.src_path)
+
+        # Process HTML
+        with timer("%s.parse" % hook):
+            htmlpage = self.engine(output, parser=self.parser, fragment=fragment)
+            valid = htmlpage.validate(page=page, plugin_config=self.plugin_config)
+
+        # Set chapter and enumerate the headings
+        with timer("%s.number" % hook):
+            htmlpage.set_page_chapter(page.chapter)
+            htmlpage.enumerate_headings()
+
+        with timer("%s.toc" % hook):
+            htmlpage.enumerate_toc(depth=self.toc_depth)
+
+        if self.keep_soup and not fragment:
+            # The tree is exactly the enumerated output, StreamHTMLPage has no tree
+            self.last_soup = getattr(htmlpage, "soup", None)
+
+        with timer("%s.serialize" % hook):
+            return str(htmlpage), valid, htmlpage.headings.records()
+
+    def _enumerate_regions(self, output, page):
+        """
+        Enumerate only the content and table of contents regions of a page.
+
+        The headings are numbered in the content region. Links in both regions
+        are enumerated with the numbering of those headings.
+
+        Args:
+            output (str): output of rendered template as string
+            page (Page): mkdocs.nav.Page instance
+
+        Returns:
+            tuple: output with the regions enumerated, whether the page passed validation,
+                and its heading records, or None if the regions were not found
+        """
+        timer = functools.partial(self.profiler.timer, page=page.file.src_path)
+        content_selectors, toc_selectors = self.region_selectors
+        engine = self.engine
+        toc_depth = self.toc_depth
+
+        with timer("on_post_page.parse"):
+            content_regions = regions.find_regions(output, content_selectors)
+            if not content_regions:
+                return None
+            if not any(self.has_headings(output, start, end) for start, end in content_regions):
+                return self.skip(output, page)
+            toc_regions = regions.without_overlap(
+                regions.find_regions(output, toc_selectors), content_regions
+            )
+            htmlpage = engine(
+                regions.join_regions(output, content_regions), parser=self.parser, fragment=True
+            )
+            valid = htmlpage.validate(page=page, plugin_config=self.plugin_config)
+
+        with timer("on_post_page.number"):
+            htmlpage.set_page_chapter(page.chapter)
+            htmlpage.enumerate_headings()
+
+        with timer("on_post_page.toc"):
+            htmlpage.enumerate_toc(depth=toc_depth)
+
+        with timer("on_post_page.serialize"):
+            replacements = list(
+                zip(content_regions, regions.split_regions(str(htmlpage), content_regions) or [])
+            )
+
+        if toc_regions and toc_depth > 0:
+            with timer("on_post_page.parse"):
+                tocpage = engine(
+                    regions.join_regions(output, toc_regions), parser=self.parser, fragment=True
+                )
+            with timer("on_post_page.toc"):
+                # Links in the toc refer to the headings of the content
+                tocpage.headings = htmlpage.headings
+                tocpage.enumerate_toc(depth=toc_depth)
+            with timer("on_post_page.serialize"):
+                toc_parts = regions.split_regions(str(tocpage), toc_regions)
+            if toc_parts is None:
+                return None
+            replacements.extend(zip(toc_regions, toc_parts))
+
+        if len(replacements) < len(content_regions):
+            # The parser moved a region marker
+            return None
+        with timer("on_post_page.serialize"):
+            return (
+                regions.splice_regions(output, replacements),
+                valid,
+                htmlpage.headings.records(),
+            )
+
+
+def enumerate_toc_items(toc, records, depth: int) -> int:
+    """
+    Prefix the titles of the table of contents of a page with their section number.
+
+    Args:
+        toc (TableOfContents): page.toc, a tree of mkdocs AnchorLinks
+        records (List[HeadingRecord]): numbering of the headings of the page
+        depth (int): Up to which level the table of contents is enumerated
+
+    Returns:
+        int: number of enumerated items
+    """
+    if depth < 1:
+        return 0
+
+    sections = {}
+    for anchor, heading_depth, section in records:
+        if anchor and heading_depth <= depth:
+            sections.setdefault(anchor, []).append(section)
+
+    enumerated = 0
+    items = list(toc)
+    while items:
+        item = items.pop()
+        if item.id in sections:
+            # Multiple headings can share an anchor, as with links the number of the last heading comes first
+            item.title = "".join(section + " " for section in reversed(sections[item.id])) + item.title
+            enumerated += 1
+        items.extend(item.children)
+    return enumerated
@@ -1,18 +1,70 @@
 # coding=utf-8
 
 
+import os
+import json
 import logging
+import functools
+import gc
+
+from concurrent.futures import ProcessPoolExecutor
 
 from collections import OrderedDict
 from mkdocs.config import config_options
 from mkdocs.plugins import BasePlugin
 from mkdocs.exceptions import ConfigurationError
-from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
-from mkdocs_enumerate_headings_plugin.exclude import exclude, include
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage, PARSERS, resolve_parser
+from mkdocs_enumerate_headings_plugin.stream_html_page import StreamHTMLPage
+from mkdocs_enumerate_headings_plugin.exclude import GlobMatcher
+from mkdocs_enumerate_headings_plugin import deferred, markdown_scan, regions, search_index
+from mkdocs_enumerate_headings_plugin.page_enumerator import (
+    THEMES_INSERTING_H1,
+    PageEnumerator,
+    enumerate_toc_items,
+)
+from mkdocs_enumerate_headings_plugin.cache import (
+    ChapterTable,
+    H1Cache,
+    OutputCache,
+    StructureCache,
+    markdown_fingerprint,
+    plugin_fingerprint,
+)
+from mkdocs_enumerate_headings_plugin.profiler import NullProfiler, Profiler
 from bs4 import BeautifulSoup
 
+try:
+    from mkdocs.plugins import event_priority
+except ImportError:  # mkdocs < 1.4
+
+    def event_priority(priority):
+        return lambda method: method
+
+
+try:
+    from mkdocs.plugins import CombinedEvent
+except ImportError:  # mkdocs < 1.6
+    CombinedEvent = None
+
+
 logger = logging.getLogger("mkdocs.plugins")
 
+# Attributes of a page set by reading and rendering it
+PAGE_STATE = (
+    "markdown",
+    "meta",
+    "content",
+    "toc",
+    "_title_from_render",
+    "present_anchor_ids",
+    "links_to_anchors",
+)
+
+ENGINES = {
+    "beautifulsoup": HTMLPage,
+    "stream": StreamHTMLPage,
+}
+
 
 class EnumerateHeadingsPlugin(BasePlugin):
     config_scheme = (
@@ -22,6 +74,26 @@ class EnumerateHeadingsPlugin(BasePlugin):
         ("restart_increment_after", config_options.Type(list, default=[])),
         ("include", config_options.Type(list, default=["*"])),
         ("exclude", config_options.Type(list, default=[])),
+        ("prescan", config_options.Choice(["render", "markdown"], default="render")),
+        ("cache", config_options.Type(bool, default=False)),
+        ("cache_dir", config_options.Type(str, default=".cache/plugin/enumerate-headings")),
+        ("engine", config_options.Choice(list(ENGINES), default="beautifulsoup")),
+        ("parser", config_options.Choice(["auto", *PARSERS], default="html.parser")),
+        ("workers", config_options.Type(int, default=1)),
+        ("regions", config_options.Type(bool, default=False)),
+        ("content_selector", config_options.Type(str, default="")),
+        ("toc_selector", config_options.Type(str, default="")),
+        ("profile", config_options.Type(bool, default=False)),
+        ("low_memory", config_options.Type(bool, default=False)),
+        ("output_cache", config_options.Type(bool, default=False)),
+        ("output_cache_size", config_options.Type(int, default=200)),
+        ("export_headings", config_options.Type(str, default="")),
+        ("search_index", config_options.Type(bool, default=False)),
+        ("deferred", config_options.Type(bool, default=False)),
+        ("pipeline", config_options.Choice(["post_page", "page_content"], default="post_page")),
+        ("same_structure_languages", config_options.Type(list, default=[])),
+        ("chunk_size", config_options.Type(int, default=0)),
+        ("attach_soup", config_options.Type(bool, default=False)),
     )
 
     def on_pre_build(self, config, **kwargs):
@@ -35,6 +107,11 @@ class EnumerateHeadingsPlugin(BasePlugin):
                 "toc_depth is set to %s, but max is 6. Update plugin settings in mkdocs.yml."
                 % self.config.get("toc_depth")
             )
+        if self.config.get("workers", 1) < 1:
+            raise ConfigurationError(
+                "workers is set to %s, but min is 1. Update plugin settings in mkdocs.yml."
+                % self.config.get("workers")
+            )
 
     def on_config(self, config, **kwargs):
 
@@ -72,8 +149,132 @@ class EnumerateHeadingsPlugin(BasePlugin):
         for p in check_plugins:
             check_position(p, plugins)
 
+        # Compile the globs of pages once, they are matched for every page
+        self.included_pages = GlobMatcher(self.config.get("include", ["*"]))
+        self.excluded_pages = GlobMatcher(self.config.get("exclude", []))
+        self.restarting_pages = GlobMatcher(self.config.get("restart_increment_after", []))
+
+        # Counting heading 1's from markdown source requires
+        # that we understand all markdown extensions used
+        self.scan_options = None
+        if self.config.get("prescan") == "markdown":
+            if markdown_scan.supports_config(config):
+                self.scan_options = markdown_scan.scan_options(config)
+            else:
+                logger.info(
+                    "[enumerate-headings-plugin] markdown_extensions are not supported by 'prescan: markdown', rendering pages instead"
+                )
+
+        self.parser = resolve_parser(self.config.get("parser"))
+
+        # Only enumerate the content and table of contents regions of a themed page
+        self.region_selectors = None
+        if self.config.get("regions"):
+            self.region_selectors = self._region_selectors(config)
+
+        # With pipeline: page_content the content is enumerated before the theme inserts a heading 1
+        self.theme_inserts_h1 = config["theme"].name in THEMES_INSERTING_H1
+
+        # Counts kept across rebuilds of `mkdocs serve` are only valid
+        # for the markdown configuration they were made with
+        if getattr(self, "command", None) == "serve":
+            fingerprint = (markdown_fingerprint(config), self.config.get("prescan"))
+            if fingerprint != self.serve_fingerprint:
+                self.serve_state = {}
+                self.serve_fingerprint = fingerprint
+
+        cache_dir = os.path.join(
+            os.path.dirname(config.get("config_file_path") or ""),
+            self.config.get("cache_dir"),
+        )
+
+        self.profiler = NullProfiler()
+        if self.config.get("profile"):
+            self.profiler = Profiler()
+            self.profile_report = os.path.join(cache_dir, "profile.json")
+
+        # Counts are shared between the builds of the languages of a multi-language site.
+        # During `mkdocs serve` only counts of unchanged files are reused, see `serve_state`.
+        self.structure_cache = None
+        languages = self.config.get("same_structure_languages")
+        if getattr(self, "command", None) != "serve" and (languages or "i18n" in config["plugins"]):
+            self.structure_cache = StructureCache(markdown_fingerprint(config), languages)
+
+        self.h1_cache = None
+        if self.config.get("cache"):
+            # Rendering and scanning the markdown can count differently
+            self.h1_cache = H1Cache(
+                os.path.join(cache_dir, "h1_counts.json"),
+                "%s %s" % (markdown_fingerprint(config), self.config.get("prescan")),
+            )
+
+        # Numbering of the headings of every enumerated page, by src_path
+        self.page_headings = {}
+        self.page_urls = {}
+        self.nav_order = []
+
+        # Chapters of the previous build, to find outdated pages with `mkdocs build --dirty`
+        self.chapter_table = ChapterTable(
+            cache_dir,
+            plugin_fingerprint(self.config, self.parser),
+            config["site_dir"],
+        )
+        self.chapters = {}
+        # Url and heading records of the pages of the previous build
+        self.previous_headings = {}
+
+        self.enumerator = PageEnumerator(
+            ENGINES[self.config.get("engine")],
+            self.parser,
+            self.config.get("toc_depth"),
+            self.config.get("strict"),
+            self.region_selectors,
+            self.profiler,
+            keep_soup=self.config.get("attach_soup"),
+        )
+        self.deferred_pages = []
+        # Page with an attached parse tree, see `_attach_result()`
+        self.soup_page = None
+
+        self.output_cache = None
+        if self.config.get("output_cache"):
+            self.output_cache = OutputCache(
+                os.path.join(cache_dir, "output"),
+                plugin_fingerprint(self.config, self.parser),
+                self.config.get("output_cache_size") * 1024 * 1024,
+            )
+
         return config
 
+    def _region_selectors(self, config):
+        """
+        Determine the selectors of the content and table of contents regions,
+        using the defaults of the theme for selectors that are not configured.
+
+        Args:
+            config (dict): global configuration object
+
+        Returns:
+            tuple: content and toc selectors (lists of regions.Selector), or None if unknown
+        """
+        theme_name = config["theme"].name
+        selectors = []
+        for region in ("content", "toc"):
+            selector = self.config.get("%s_selector" % region) or regions.theme_selectors(
+                theme_name, region
+            )
+            if selector is None:
+                logger.warning(
+                    "[enumerate-headings-plugin] No default %s_selector for theme '%s', enumerating the full pages instead"
+                    % (region, theme_name)
+                )
+                return None
+            try:
+                selectors.append(regions.parse_selectors(selector))
+            except ValueError as e:
+                raise ConfigurationError("[enumerate-headings-plugin] %s" % e)
+        return tuple(selectors)
+
     def on_nav(self, nav, config, files, **kwargs):
         """
         The nav event is called after the site navigation is created
@@ -92,39 +293,166 @@ class EnumerateHeadingsPlugin(BasePlugin):
             files: global files collection
         
         """
-        chapter_counter = 0
-        markdown_files_processed = {}
+        with self.profiler.timer("on_nav"):
+            if self.h1_cache is not None:
+                self.h1_cache.load()
+
+            # Include and exclude pages specified in config
+            pages = [
+                page
+                for page in nav.pages
+                if self.included_pages(page.file.src_path)
+                and not self.excluded_pages(page.file.src_path)
+            ]
+
+            for page, h1s in zip(pages, self._count_h1s(pages, config, files)):
+                # We assume here a page always has a heading 1, even if empty
+                # MkDocs will determine the title based on a simple heuristic
+                # (see https://www.mkdocs.org/user-guide/writing-your-docs/#meta-data)
+                # and some themes will insert the page title as a heading 1, if heading 1 is missing
+                page.number_h1s = max(h1s, 1)
+
+            if self.h1_cache is not None:
+                self.h1_cache.save()
+
+            for page, chapter in zip(pages, self._chapter_table(pages)):
+                page.chapter = chapter
+
+            self.nav_order = [page.file.src_path for page in pages]
+
+            self.chapters = {page.file.src_path: page.chapter for page in pages}
+            if getattr(self, "dirty", False):
+                self._rebuild_shifted_pages(nav.pages)
+
+    # Run before other plugins, so they read the enumerated pages
+    @event_priority(100)
+    def _on_post_build_pages(self, config, **kwargs):
+        """
+        First part of the post_build event, see `on_post_build`.
 
-        for page in nav.pages:
-            # Include pages specified in config
-            included_pages = self.config.get("include", ["*"])
-            # Exclude pages specified in config
-            excluded_pages = self.config.get("exclude", [])
-            if not include(page.file.src_path, included_pages) or exclude(
-                page.file.src_path, excluded_pages
-            ):
-                continue
+        We use this part to enumerate the written pages in deferred mode,
+        to evict old entries from the output cache and to write the heading index,
+        before other plugins (f.e. PDF exporters or link checkers) read the site.
 
-            # We need to build the pages in order to find out
-            # if there are more than one heading 1's in the page
-            page.read_source(config)
-            page.render(config, files)
-            soup = BeautifulSoup(page.content, "html.parser")
-            h1s = soup.find_all("h1")
+        Args:
+            config (dict): global configuration object
+        """
+        self._release_soup()
+
+        if self.deferred_pages:
+            with self.profiler.timer("on_post_build.deferred"):
+                self._enumerate_deferred()
+
+        if getattr(self, "dirty", False):
+            self._restore_skipped_headings()
+
+        if self.output_cache is not None:
+            evicted = self.output_cache.evict()
+            logger.debug(
+                "[enumerate-headings-plugin] Output cache: %s hits, %s misses, %s entries evicted"
+                % (self.output_cache.hits, self.output_cache.misses, evicted)
+            )
+
+        if self.config.get("export_headings"):
+            path = os.path.join(config["site_dir"], self.config.get("export_headings"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.heading_index(), f, separators=(",", ":"))
+
+    # Run after other plugins, so the search index is already written
+    @event_priority(-50)
+    def _on_post_build_search_index(self, config, **kwargs):
+        """
+        Last part of the post_build event, see `on_post_build`.
 
-            # We assume here a page always has a heading 1, even if empty
-            # MkDocs will determine the title based on a simple heuristic
-            # (see https://www.mkdocs.org/user-guide/writing-your-docs/#meta-data)
-            # and some themes will insert the page title as a heading 1, if heading 1 is missing
-            page.number_h1s = max(len(h1s), 1)
+        We use this part to add section numbers to the search index,
+        to save the chapter of every page and to write the profiling report.
 
+        Args:
+            config (dict): global configuration object
+        """
+        # With pipeline: page_content the search plugin already indexes numbered headings
+        if self.config.get("search_index") and self.config.get("pipeline") != "page_content":
+            path = os.path.join(config["site_dir"], search_index.SEARCH_INDEX_PATH)
+            if os.path.isfile(path):
+                locations = search_index.section_locations(self.page_headings, self.page_urls)
+                search_index.enumerate_search_index(path, locations)
+            else:
+                logger.warning(
+                    "[enumerate-headings-plugin] search_index is enabled, but %s was not found"
+                    % path
+                )
+
+        # Keep the table when it is needed for the next dirty build,
+        # or when the user opted in to caching
+        if self.config.get("cache") or getattr(self, "dirty", False):
+            self.chapter_table.save(self.chapters, self.page_headings, self.page_urls)
+        else:
+            self.chapter_table.clear()
+
+        if self.config.get("profile"):
+            self.profiler.write(self.profile_report)
+            logger.info(
+                "[enumerate-headings-plugin] Profile: %s. Report written to %s"
+                % (self.profiler.summary(), self.profile_report)
+            )
+
+    # The post_build event does not alter any variables.
+    # Use this event to call post-build scripts.
+    # See: https://www.mkdocs.org/user-guide/plugins/#on_post_build
+    if CombinedEvent is not None:
+        on_post_build = CombinedEvent(_on_post_build_pages, _on_post_build_search_index)
+    else:  # mkdocs < 1.6, other plugins read the pages before they are enumerated in deferred mode
+
+        @event_priority(-50)
+        def on_post_build(self, config, **kwargs):
+            self._on_post_build_pages(config)
+            self._on_post_build_search_index(config)
+
+    def on_startup(self, command, dirty, **kwargs):
+        """
+        The startup event runs once at the very beginning of an `mkdocs` invocation.
+
+        See:
+        https://www.mkdocs.org/user-guide/plugins/#on_startup
+
+        Defining this event makes MkDocs keep the same plugin instance
+        across all rebuilds of `mkdocs serve`, so we can remember the
+        number of heading 1's of pages that did not change.
+
+        Args:
+            command (str): the command that MkDocs was invoked with
+            dirty (bool): whether `--dirty` was passed
+        """
+        self.command = command
+        self.dirty = dirty
+        self.serve_state = {}
+        self.serve_fingerprint = None
+
+    def _chapter_table(self, pages) -> list:
+        """
+        Determine the chapter number of every page, in navigation order.
+
+        The chapter of a page is a prefix sum over the number of heading 1's
+        of all preceding pages, restarted where configured.
+
+        Args:
+            pages (list): included mkdocs.nav.Page instances, in navigation order
+
+        Returns:
+            list: chapter number per page
+        """
+        chapters = []
+        chapter_counter = 0
+        markdown_files_processed = {}
+
+        for page in pages:
             # Optionally do not increment counter across pages.
             if self.config.get('increment_across_pages') is False:
                 chapter_counter = 0
 
             # Optionally reset the counter for this page
-            restarting_pages = self.config.get("restart_increment_after", [])
-            if exclude(page.file.src_path, restarting_pages):
+            if self.restarting_pages(page.file.src_path):
                 chapter_counter = 0
 
             # Some markdown files could be used multiple times in the same navigation
@@ -137,7 +465,277 @@ class EnumerateHeadingsPlugin(BasePlugin):
             else:
                 chapter = markdown_files_processed[page.file.abs_src_path]
 
-            page.chapter = chapter
+            chapters.append(chapter)
+
+        return chapters
+
+    def _rebuild_shifted_pages(self, pages) -> None:
+        """
+        Make MkDocs rebuild the pages whose chapter changed since the previous build,
+        even if their source did not change.
+
+        With `--dirty`, MkDocs skips pages whose written file is newer than the source.
+        Resetting the modification time of the written file marks it as outdated.
+
+        Args:
+            pages (list): all mkdocs.nav.Page instances in the navigation
+        """
+        previous = self.chapter_table.load()
+        if previous is not None:
+            previous_chapters, self.previous_headings = previous
+        shifted = 0
+        for page in pages:
+            src_path = page.file.src_path
+            if previous is not None and previous_chapters.get(src_path) == self.chapters.get(src_path):
+                continue
+            if os.path.isfile(page.file.abs_dest_path):
+                os.utime(page.file.abs_dest_path, (0, 0))
+                shifted += 1
+
+        if shifted:
+            logger.info(
+                "[enumerate-headings-plugin] Rebuilding %s pages whose chapter changed" % shifted
+            )
+
+    def _restore_skipped_headings(self) -> None:
+        """
+        With `--dirty`, MkDocs does not build pages that are up to date on disk.
+        Their chapter did not change, so their heading records of the previous build are still valid.
+        Restore those, so the heading index, the search index and `get_headings()` cover all pages.
+        """
+        for src_path, (url, records) in self.previous_headings.items():
+            if src_path in self.chapters and src_path not in self.page_headings:
+                self.page_headings[src_path] = records
+                self.page_urls[src_path] = url
+
+    def _count_h1s(self, pages, config, files) -> list:
+        """
+        Count the number of heading 1's of every page.
+
+        With `prescan: markdown` the headings are found in the markdown source,
+        and only pages the scanner cannot classify are rendered.
+        With `workers` > 1 the markdown sources are scanned in a process pool.
+        Pages counted before in the same process, in the build of another language
+        of a multi-language site, are not scanned again.
+        With `cache: true` pages with an unchanged source are not scanned again,
+        and during `mkdocs serve` pages with an unchanged source file are not even read again,
+        unless they include other files.
+        With `low_memory: true` every page is restored to its unread state after counting.
+
+        Args:
+            pages (list): mkdocs.nav.Page instances
+            config (dict): global configuration object
+            files: global files collection
+
+        Returns:
+            list: number of heading 1's per page, in the same order as pages
+        """
+        workers = self.config.get("workers")
+        parallel = workers > 1 and self.scan_options is not None
+
+        counts = []
+        # Pages left to scan in a process pool, with their signature and state
+        pending = []
+        for index, page in enumerate(pages):
+            signature = self._source_signature(page)
+            state = self.serve_state.get(page.file.abs_src_path) if signature else None
+            if state is not None and state[0] == signature:
+                if self.h1_cache is not None:
+                    self.h1_cache.keep(page.file.abs_src_path)
+                counts.append(state[1])
+                continue
+
+            # Pages of languages with the same structure as a language built before
+            if self.structure_cache is not None:
+                h1s = self.structure_cache.get_path(page.file.src_path)
+                if h1s is not None:
+                    if self.h1_cache is not None:
+                        # All languages share the cache file, also keep the entry the count comes from
+                        neutral_path = self.structure_cache.neutral_path(page.file.src_path)
+                        self.h1_cache.keep(page.file.abs_src_path or page.file.src_path)
+                        self.h1_cache.keep(os.path.normpath(os.path.join(config["docs_dir"], neutral_path)))
+                    counts.append(h1s)
+                    continue
+
+            page_state = self._page_state(page)
+            with self.profiler.timer("on_nav.read"):
+                page.read_source(config)
+
+            h1s = None
+            if self.structure_cache is not None:
+                h1s = self.structure_cache.get_source(page.markdown)
+            if h1s is not None:
+                self._store_h1s(page, h1s)
+            elif self.h1_cache is not None:
+                h1s = self.h1_cache.get(page.file.abs_src_path or page.file.src_path, page.markdown)
+            if h1s is None and parallel:
+                pending.append((index, signature, page_state))
+                counts.append(None)
+                continue
+            if h1s is None:
+                h1s = self._find_h1s(page, config, files)
+                self._store_h1s(page, h1s)
+
+            counts.append(h1s)
+            self._finish_page(page, h1s, signature, page_state)
+
+        if pending:
+            scanned = self._scan_parallel(
+                [pages[index].markdown for index, _, _ in pending], workers
+            )
+            for (index, signature, page_state), h1s in zip(pending, scanned):
+                page = pages[index]
+                if h1s is None:
+                    h1s = self._render_h1s(page, config, files)
+                self._store_h1s(page, h1s)
+                counts[index] = h1s
+                self._finish_page(page, h1s, signature, page_state)
+
+        return counts
+
+    def _store_h1s(self, page, h1s):
+        if self.h1_cache is not None:
+            self.h1_cache.set(page.file.abs_src_path or page.file.src_path, page.markdown, h1s)
+
+    def _finish_page(self, page, h1s, signature, page_state):
+        if self.structure_cache is not None:
+            self.structure_cache.set(page.file.src_path, page.markdown, h1s)
+        # Included files can change without changing the source file of the page
+        if signature and not markdown_scan.has_includes(page.markdown):
+            self.serve_state[page.file.abs_src_path] = (signature, h1s)
+        if page_state is not None:
+            self._restore_page_state(page, page_state)
+
+    def _page_state(self, page):
+        """
+        With `low_memory: true`, remember the attributes of a page
+        that reading and rendering it will set.
+
+        Returns:
+            dict: attributes of the page, or None if not in low memory mode
+        """
+        if not self.config.get("low_memory"):
+            return None
+        return {name: page.__dict__[name] for name in PAGE_STATE if name in page.__dict__}
+
+    def _restore_page_state(self, page, page_state):
+        """
+        Drop the source, rendered content and table of contents of a page after counting,
+        so that the pre-scan does not hold the whole rendered site in memory.
+        MkDocs reads and renders every page again when it is built.
+        """
+        rendered = page.content is not None
+        for name in PAGE_STATE:
+            if name in page_state:
+                setattr(page, name, page_state[name])
+            else:
+                page.__dict__.pop(name, None)
+
+        if rendered:
+            # The markdown converter and the BeautifulSoup tree have reference cycles,
+            # so they would only be freed whenever the garbage collector happens to run
+            gc.collect()
+
+    def _source_signature(self, page):
+        """
+        Modification time and size of the source file of a page,
+        used to detect changed files during `mkdocs serve`.
+
+        Returns:
+            tuple: (mtime_ns, size), or None when not serving or the page has no source file
+        """
+        if getattr(self, "command", None) != "serve" or not page.file.abs_src_path:
+            return None
+        try:
+            stat = os.stat(page.file.abs_src_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _scan_parallel(self, sources, workers) -> list:
+        """
+        Count heading 1's of markdown sources in a pool of processes.
+
+        Args:
+            sources (list): markdown sources
+            workers (int): number of processes
+
+        Returns:
+            list: number of heading 1's (or None if unclassifiable) per source, in the same order
+        """
+        count_h1s = functools.partial(markdown_scan.count_h1s, **self.scan_options)
+        chunksize = max(1, len(sources) // (4 * workers))
+        with self.profiler.timer("on_nav.scan"), ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(count_h1s, sources, chunksize=chunksize))
+
+    def _find_h1s(self, page, config, files) -> int:
+        if self.scan_options is not None:
+            with self.profiler.timer("on_nav.scan"):
+                h1s = markdown_scan.count_h1s(page.markdown, **self.scan_options)
+            if h1s is not None:
+                return h1s
+        return self._render_h1s(page, config, files)
+
+    def _render_h1s(self, page, config, files) -> int:
+        # We need to build the pages in order to find out
+        # if there are more than one heading 1's in the page
+        with self.profiler.timer("on_nav.render"):
+            page.render(config, files)
+        with self.profiler.timer("on_nav.parse"):
+            soup = BeautifulSoup(page.content, self.parser)
+            h1s = len(soup.find_all("h1"))
+            return h1s
+
+    def on_page_content(self, html, page, config, files, **kwargs):
+        """
+        The page_content event is called after the Markdown text is rendered to HTML
+        (but before being passed to a template) and can be used to alter the HTML body of the page.
+
+        See:
+        https://www.mkdocs.org/user-guide/plugins/#on_page_content
+
+        With `pipeline: page_content` we enumerate the headings in the content of the page,
+        and the titles of `page.toc`, so the theme renders a numbered table of contents.
+
+        Args:
+            html (str): HTML rendered from Markdown source as string
+            page (Page): mkdocs.nav.Page instance
+            config (dict): global configuration object
+            files: global files collection
+
+        Returns:
+            html (str): HTML rendered from Markdown source as string
+        """
+        if self.config.get("pipeline") != "page_content":
+            return html
+        with self.profiler.timer("on_page_content", page=page.file.src_path):
+            if self.theme_inserts_h1 and "<h1" not in html and self._should_enumerate(page):
+                # Insert the heading 1 the same way the theme would, so it is enumerated too.
+                # The theme then leaves the content as is.
+                html = "<h1>%s</h1>\n%s" % (page.title or config["site_name"], html)
+            html = self._enumerate_content(html, page)
+            self._attach_result(page)
+            return html
+
+    def _enumerate_content(self, html, page):
+        if not self._should_enumerate(page):
+            return html
+
+        key = None
+        if self.output_cache is not None:
+            with self.profiler.timer("on_page_content.cache", page=page.file.src_path):
+                key = self.output_cache.key(html, page.chapter)
+                cached = self.output_cache.get(key)
+            if cached is not None:
+                html, records = cached
+                self._record_headings(page, records)
+                enumerate_toc_items(page.toc, records, self.config.get("toc_depth"))
+                return html
+
+        html, valid, records = self.enumerator.enumerate_content(html, page)
+        self._finish_enumeration(page, key, html, valid, records)
+        enumerate_toc_items(page.toc, records, self.config.get("toc_depth"))
+        return html
 
     def on_post_page(self, output, page, config, **kwargs):
         """
@@ -158,30 +756,160 @@ class EnumerateHeadingsPlugin(BasePlugin):
         Returns:
             output (str): output of rendered template as string
         """
+        if self.config.get("pipeline") == "page_content":
+            # Already enumerated in on_page_content
+            return output
+        with self.profiler.timer("on_post_page", page=page.file.src_path):
+            self._release_soup()
+            output = self._enumerate_page(output, page)
+            self._attach_result(page)
+            return output
 
+    def _attach_result(self, page):
+        """
+        Attach the result of enumerating a page to the page, for plugins defined after this one.
+
+        `page.enumerated_headings` is the list of HeadingRecords of the page,
+        or None if the page was not enumerated (yet).
+        With `attach_soup: true`, `page.enumerated_soup` is the BeautifulSoup tree
+        of the enumerated output, or None if the page was not parsed into a full tree.
+        The tree is released when the next page is enumerated, and at the end of the build.
+        """
+        page.enumerated_headings = self.page_headings.get(page.file.src_path)
+        if self.config.get("attach_soup"):
+            page.enumerated_soup = self.enumerator.last_soup
+            if page.enumerated_soup is not None:
+                self.soup_page = page
+
+    def _release_soup(self):
+        if self.soup_page is not None:
+            self.soup_page.enumerated_soup = None
+            self.soup_page = None
+        self.enumerator.last_soup = None
+
+    def _should_enumerate(self, page) -> bool:
         # Exclude pages specified in config
-        excluded_pages = self.config.get("exclude", [])
-        if exclude(page.file.src_path, excluded_pages):
-            return
+        if self.excluded_pages(page.file.src_path):
+            return False
 
-        # Skip enumeration if page not in navigation, or if page does not have any headings
+        # Skip enumeration if page not in navigation
         if not hasattr(page, "chapter"):
-            return output
+            return False
 
         if str(page.file.abs_src_path).endswith("ipynb"):
             logger.warning(
                 "[enumerate-headings-plugin] Skipping enumeration of %s"
                 % page.file.src_path
             )
+            return False
+        return True
+
+    def _enumerate_page(self, output, page):
+        if not self._should_enumerate(page):
+            return output
+
+        # Skip pages without headings before hashing or deferring them
+        if not self.enumerator.has_headings(output):
+            output, _, records = self.enumerator.skip(output, page)
+            self._record_headings(page, records)
+            return output
+
+        timer = functools.partial(self.profiler.timer, page=page.file.src_path)
+
+        key = None
+        if self.output_cache is not None:
+            with timer("on_post_page.cache"):
+                key = self.output_cache.key(output, page.chapter)
+                cached = self.output_cache.get(key)
+            if cached is not None:
+                output, records = cached
+                self._record_headings(page, records)
+                return output
+
+        if self.config.get("deferred"):
+            # The written file is enumerated in on_post_build
+            self.deferred_pages.append(
+                deferred.DeferredPage(
+                    page.file.src_path, page.file.abs_dest_path, page.url, page.chapter, key
+                )
+            )
             return output
 
-        # Process HTML
-        htmlpage = HTMLPage(output)
-        htmlpage.validate(page=page, plugin_config=self.config)
+        output, valid, records = self.enumerator.enumerate_with_headings(output, page)
+        self._finish_enumeration(page, key, output, valid, records)
+        return output
+
+    def _finish_enumeration(self, page, key, output, valid, records):
+        self._record_headings(page, records)
+
+        # Pages that are not valid are not cached, so the warning is shown on every build
+        if key is not None and valid:
+            with self.profiler.timer("on_post_page.cache", page=page.file.src_path):
+                self.output_cache.set(key, output, records)
+
+    def _record_headings(self, page, records):
+        self.page_headings[page.file.src_path] = records
+        self.page_urls[page.file.src_path] = page.url
+
+    def _enumerate_deferred(self):
+        """
+        Enumerate the pages written in deferred mode, in place,
+        in a pool of `workers` processes.
+        """
+        pages, self.deferred_pages = self.deferred_pages, []
+        keep_output = self.output_cache is not None
+        workers = self.config.get("workers")
+        rewrite = functools.partial(
+            deferred.rewrite_page,
+            self.enumerator,
+            keep_output=keep_output,
+            chunk_size=self.config.get("chunk_size") * 1024,
+        )
+        if workers > 1 and len(pages) > 1:
+            chunksize = max(1, len(pages) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(rewrite, pages, chunksize=chunksize))
+        else:
+            results = [rewrite(page) for page in pages]
+
+        for page, (output, valid, records) in zip(pages, results):
+            # Chunked pages are never held in memory, so they are not cached
+            key = page.key if output is not None else None
+            self._finish_enumeration(page, key, output, valid, records)
+
+    def get_headings(self, src_path):
+        """
+        Get the numbering of the headings of a page, without parsing it again.
 
-        # Set chapter and enumerate the headings
-        htmlpage.set_page_chapter(page.chapter)
+        Other plugins can use this from `on_post_page` of a page
+        (if defined after this plugin) or from `on_post_build`.
 
-        htmlpage.enumerate_headings()
-        htmlpage.enumerate_toc(depth=self.config.get("toc_depth"))
-        return str(htmlpage)
+        Args:
+            src_path (str): path of the page source, relative to the docs folder
+
+        Returns:
+            List[HeadingRecord]: anchor, depth and section number of every heading,
+                or None if the page was not enumerated (yet)
+        """
+        return self.page_headings.get(src_path)
+
+    def heading_index(self) -> dict:
+        """
+        Get the numbering of the headings of all enumerated pages.
+
+        Returns:
+            dict: export format with the url and headings of every page, in navigation order
+        """
+        order = {src_path: index for index, src_path in enumerate(self.nav_order)}
+        src_paths = sorted(self.page_headings, key=lambda p: (order.get(p, len(order)), p))
+        return {
+            "version": 1,
+            "pages": [
+                {
+                    "src_path": src_path,
+                    "url": self.page_urls[src_path],
+                    "headings": [list(record) for record in self.page_headings[src_path]],
+                }
+                for src_path in src_paths
+            ],
+        }
@@ -0,0 +1,134 @@
+"""
+Module to measure where the plugin spends time during a build.
+"""
+import os
+import json
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+# Number of pages listed in the report, slowest first
+SLOWEST_PAGES = 10
+PERCENTILES = (50, 90, 99)
+
+
+class Profiler:
+    """
+    Accumulates the time spent in named sections of the plugin,
+    in total and per page.
+
+    Names are prefixed with the hook they belong to, f.e. 'on_nav.render'.
+    Events that take no time to speak of, like skipped pages, are counted instead.
+    """
+
+    def __init__(self) -> None:
+        self.totals = {}
+        self.pages = {}
+        self.counts = {}
+
+    @contextmanager
+    def timer(self, name: str, page: Optional[str] = None):
+        """
+        Time the body of a with statement.
+
+        Args:
+            name (str): name of the section
+            page (str): src_path of the page the time should be attributed to
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            if page is not None:
+                timings = self.pages.setdefault(page, {})
+                timings[name] = timings.get(name, 0.0) + elapsed
+
+    def count(self, name: str) -> None:
+        """
+        Count an event.
+
+        Args:
+            name (str): name of the event
+        """
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def report(self, slowest: int = SLOWEST_PAGES) -> dict:
+        """
+        Returns:
+            dict: totals per section, percentiles over pages per section and the slowest pages
+        """
+        sections = sorted({name for timings in self.pages.values() for name in timings})
+        percentiles = {}
+        for name in sections:
+            values = sorted(timings.get(name, 0.0) for timings in self.pages.values())
+            percentiles[name] = {"p%s" % p: percentile(values, p) for p in PERCENTILES}
+            percentiles[name]["max"] = values[-1]
+
+        slowest_pages = sorted(
+            self.pages.items(),
+            key=lambda item: item[1].get("on_post_page", 0.0) + item[1].get("on_page_content", 0.0),
+            reverse=True,
+        )[:slowest]
+
+        return {
+            "total": self.total,
+            "totals": dict(sorted(self.totals.items())),
+            "pages": len(self.pages),
+            "counts": dict(sorted(self.counts.items())),
+            "percentiles": percentiles,
+            "slowest_pages": [dict(page=page, **timings) for page, timings in slowest_pages],
+        }
+
+    @property
+    def total(self) -> float:
+        # Sections of a hook are part of the time of the hook itself
+        return sum(seconds for name, seconds in self.totals.items() if "." not in name)
+
+    def summary(self) -> str:
+        # Pages are enumerated in either on_post_page or on_page_content
+        hook = "on_page_content" if "on_page_content" in self.totals else "on_post_page"
+        return "%.2fs in total, on_nav %.2fs, %s %.2fs over %s pages (%s skipped)" % (
+            self.total,
+            self.totals.get("on_nav", 0.0),
+            hook,
+            self.totals.get(hook, 0.0),
+            len(self.pages),
+            self.counts.get("%s.skipped" % hook, 0),
+        )
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class NullProfiler:
+    """
+    Profiler that does not measure anything, used when profiling is disabled.
+    """
+
+    def timer(self, name: str, page: Optional[str] = None):
+        return nullcontext()
+
+    def count(self, name: str) -> None:
+        pass
+
+
+def percentile(values: list, p: int) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (list): sorted values
+        p (int): percentile, between 0 and 100
+
+    Returns:
+        float: value at the percentile, or 0.0 if there are no values
+    """
+    if not values:
+        return 0.0
+    rank = math.ceil(p / 100 * len(values))
+    return values[max(rank - 1, 0)]
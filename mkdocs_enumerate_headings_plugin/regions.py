@@ -0,0 +1,249 @@
+"""
+Module to find regions of a themed HTML page, without parsing the page.
+
+A region is an element matched by a simple CSS selector, f.e. the article
+with the page content or the sidebar with the table of contents.
+The page is only tokenized with a regular expression to find start and end tags,
+so that the regions can be cut out, enumerated separately, and spliced back.
+
+Supported selectors are a tag name, `#id`, `.class`, `[attr]` and `[attr=value]`,
+or a compound of those (f.e. `article.md-content__inner`).
+Multiple selectors can be separated with a comma.
+Combinators (f.e. `nav > ul`) are not supported.
+"""
+import re
+from typing import List, Optional, Tuple
+
+# Region selectors of the content and the table of contents, per theme
+THEME_REGIONS = {
+    "mkdocs": {"content": 'div[role="main"]', "toc": "div.bs-sidebar"},
+    "readthedocs": {"content": 'div[role="main"]', "toc": "div.wy-menu-vertical"},
+    "material": {"content": "article.md-content__inner", "toc": "nav.md-nav--secondary"},
+}
+
+# Separates regions that are enumerated together
+MARKER = "<!-- enumerate-headings-plugin region -->"
+
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+SELECTOR_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)?(?P<parts>(?:[#.][\w-]+|\[[^\]]+\])*)$"
+)
+SELECTOR_PART_RE = re.compile(
+    r"#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[\s*(?P<attr>[^\]=\s]+)\s*(?:=\s*(?P<value>[^\]]*?)\s*)?\]"
+)
+ATTR_RE = re.compile(
+    r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?"""
+)
+# Comments, raw text elements, end tags and start tags, in document order
+TOKEN_RE = re.compile(
+    r"""<!--.*?-->"""
+    r"""|<(script|style|textarea)\b[^>]*>.*?</\1\s*>"""
+    r"""|</([a-zA-Z][a-zA-Z0-9-]*)\s*>"""
+    r"""|<([a-zA-Z][a-zA-Z0-9-]*)((?:\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?)*)\s*(/?)>""",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+class Selector:
+    """
+    A compound CSS selector, matched against the name and attributes of a start tag.
+    """
+
+    __slots__ = ("tag", "id", "classes", "attrs")
+
+    def __init__(self, selector: str) -> None:
+        """
+        Args:
+            selector (str): f.e. 'article.md-content__inner' or 'div[role="main"]'
+
+        Raises:
+            ValueError: if the selector is not supported
+        """
+        match = SELECTOR_RE.match(selector.strip())
+        if not match or not selector.strip():
+            raise ValueError("Unsupported region selector '%s'" % selector)
+
+        self.tag = (match.group("tag") or "").lower() or None
+        self.id = None
+        self.classes = []
+        self.attrs = []
+        for part in SELECTOR_PART_RE.finditer(match.group("parts")):
+            if part.group("id"):
+                self.id = part.group("id")
+            elif part.group("cls"):
+                self.classes.append(part.group("cls"))
+            else:
+                value = part.group("value")
+                if value is not None:
+                    value = value.strip("\"'")
+                self.attrs.append((part.group("attr").lower(), value))
+
+    def matches(self, name: str, attrs: dict) -> bool:
+        """
+        Args:
+            name (str): lowercase tag name
+            attrs (dict): attributes of the tag, with lowercase names
+
+        Returns:
+            bool: whether the tag matches the selector
+        """
+        if self.tag is not None and name != self.tag:
+            return False
+        if self.id is not None and attrs.get("id") != self.id:
+            return False
+        if self.classes:
+            classes = (attrs.get("class") or "").split()
+            if not all(cls in classes for cls in self.classes):
+                return False
+        for attr, value in self.attrs:
+            if attr not in attrs:
+                return False
+            if value is not None and attrs[attr] != value:
+                return False
+        return True
+
+
+def parse_selectors(selectors: str) -> List[Selector]:
+    """
+    Args:
+        selectors (str): comma separated selectors
+
+    Returns:
+        List[Selector]: parsed selectors
+
+    Raises:
+        ValueError: if one of the selectors is not supported
+    """
+    return [Selector(selector) for selector in selectors.split(",") if selector.strip()]
+
+
+def theme_selectors(theme_name: str, region: str) -> Optional[str]:
+    """
+    Args:
+        theme_name (str): name of the mkdocs theme
+        region (str): 'content' or 'toc'
+
+    Returns:
+        str: default selectors of the region for the theme, or None for unknown themes
+    """
+    return THEME_REGIONS.get(theme_name, {}).get(region)
+
+
+def find_regions(content: str, selectors: List[Selector]) -> List[Tuple[int, int]]:
+    """
+    Find the elements matching any of the selectors.
+
+    Regions nested in an earlier matched region are not reported separately.
+
+    Args:
+        content (str): HTML page
+        selectors (List[Selector]): selectors of the regions
+
+    Returns:
+        List[Tuple[int, int]]: start and end offset of every matched element, in document order
+    """
+    regions = []
+    if not selectors:
+        return regions
+
+    # Name, start offset and nesting depth of the region we are in
+    region_name, region_start, depth = None, 0, 0
+    for token in TOKEN_RE.finditer(content):
+        end_name, start_name = token.group(2), token.group(3)
+
+        if region_name is not None:
+            if end_name and end_name.lower() == region_name:
+                depth -= 1
+                if depth == 0:
+                    regions.append((region_start, token.end()))
+                    region_name = None
+            elif start_name and start_name.lower() == region_name and not token.group(5):
+                depth += 1
+            continue
+
+        if not start_name or token.group(5):
+            continue
+        name = start_name.lower()
+        if name in VOID_ELEMENTS:
+            continue
+        attrs = _parse_attrs(token.group(4))
+        if any(selector.matches(name, attrs) for selector in selectors):
+            region_name, region_start, depth = name, token.start(), 1
+
+    return regions
+
+
+def without_overlap(regions, others) -> List[Tuple[int, int]]:
+    """
+    Args:
+        regions (List[Tuple[int, int]]): regions to filter
+        others (List[Tuple[int, int]]): regions that take precedence
+
+    Returns:
+        List[Tuple[int, int]]: regions that do not overlap any of the others
+    """
+    return [
+        (start, end)
+        for start, end in regions
+        if not any(start < other_end and other_start < end for other_start, other_end in others)
+    ]
+
+
+def join_regions(content: str, regions: List[Tuple[int, int]]) -> str:
+    """
+    Cut the regions out of the page, separated by a marker.
+    """
+    return MARKER.join(content[start:end] for start, end in regions)
+
+
+def split_regions(fragment: str, regions: List[Tuple[int, int]]) -> Optional[List[str]]:
+    """
+    Split a fragment created with `join_regions()`.
+
+    Returns:
+        List[str]: one string per region, or None if markers were lost
+    """
+    parts = fragment.split(MARKER)
+    if len(parts) != len(regions):
+        return None
+    return parts
+
+
+def splice_regions(content: str, replacements: List[Tuple[Tuple[int, int], str]]) -> str:
+    """
+    Replace regions of the page.
+
+    Args:
+        content (str): HTML page
+        replacements (list): non-overlapping tuples of a region and its new content
+
+    Returns:
+        str: HTML page
+    """
+    parts = []
+    position = 0
+    for (start, end), replacement in sorted(replacements, key=lambda r: r[0][0]):
+        parts.append(content[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(content[position:])
+    return "".join(parts)
+
+
+def _parse_attrs(text: str) -> dict:
+    attrs = {}
+    for match in ATTR_RE.finditer(text or ""):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+        attrs[name] = value if value is not None else ""
+    return attrs
@@ -0,0 +1,66 @@
+"""
+Module to add section numbers to the titles in the index of the search plugin.
+
+The search plugin builds its index from the rendered markdown of each page,
+before the themed pages are enumerated, so the index has no section numbers.
+The index is rewritten once after the build, using the numbering
+collected while the pages were enumerated.
+"""
+import os
+import json
+import logging
+from typing import Dict
+
+logger = logging.getLogger("mkdocs.plugins")
+
+SEARCH_INDEX_PATH = os.path.join("search", "search_index.json")
+
+
+def section_locations(page_headings: Dict[str, list], page_urls: Dict[str, str]) -> Dict[str, str]:
+    """
+    Args:
+        page_headings (dict): heading records per src_path
+        page_urls (dict): url per src_path
+
+    Returns:
+        dict: section number string by search index location (url + '#' + anchor)
+    """
+    locations = {}
+    for src_path, records in page_headings.items():
+        url = page_urls[src_path]
+        for anchor, _, section in records:
+            if anchor:
+                locations.setdefault("%s#%s" % (url, anchor), section)
+    return locations
+
+
+def enumerate_search_index(path: str, locations: Dict[str, str]) -> int:
+    """
+    Prefix the titles of the sections in a search index with their section number.
+
+    Args:
+        path (str): path of search_index.json
+        locations (dict): section number string by location, see `section_locations()`
+
+    Returns:
+        int: number of enumerated titles
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    enumerated = 0
+    for entry in data.get("docs", []):
+        section = locations.get(entry.get("location"))
+        if section and entry.get("title") is not None:
+            entry["title"] = "%s %s" % (section, entry["title"])
+            enumerated += 1
+
+    if "index" in data and enumerated:
+        logger.warning(
+            "[enumerate-headings-plugin] The search index is pre-built, section numbers are only added to the displayed titles"
+        )
+
+    # Same format as the search plugin writes
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, sort_keys=True, separators=(",", ":"), default=str))
+    return enumerated
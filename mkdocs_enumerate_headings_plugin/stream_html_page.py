@@ -0,0 +1,179 @@
+"""
+Module with an alternative to `HTMLPage` that does not build a BeautifulSoup tree.
+
+The page is tokenized once with the streaming `html.parser.HTMLParser`
+(the same tokenizer BeautifulSoup's "html.parser" uses) to find the offsets
+of all heading and link start tags. Section numbers are then spliced into
+the original string, leaving every other byte of the page untouched.
+"""
+from html.parser import HTMLParser
+from typing import Dict, List
+
+from mkdocs_enumerate_headings_plugin.heading import HeadingTable
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+class Tag:
+    """
+    Start tag found by the tokenizer, with the minimal interface
+    of a `bs4.element.Tag` that `HeadingTable` relies on.
+    """
+
+    __slots__ = ("name", "attrs", "start", "end", "selfclosing")
+
+    # Text content is never parsed
+    string = None
+
+    def __init__(self, name, attrs, start, end, selfclosing=False) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.end = end
+        self.selfclosing = selfclosing
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+
+def heading_text(headings: HeadingTable, index: int, add_span_element: bool = True) -> str:
+    """
+    Text to insert at the start of the content of a heading.
+
+    Args:
+        headings (HeadingTable): headings of the page, with their section numbering
+        index (int): index of the heading
+        add_span_element (bool): Wrap numbering with <span class='enumerate-heading-plugin'></span>. Defaults to True.
+
+    Returns:
+        str: section number of the heading as HTML, followed by a space
+    """
+    section_string = headings.section_number_string(index)
+    if add_span_element:
+        # Note we add both enumerate-headings-plugin and enumerate-heading-plugin
+        # This is for backward compatibility
+        section_string = (
+            '<span class="enumerate-headings-plugin enumerate-heading-plugin">%s</span>'
+            % section_string
+        )
+    return section_string + " "
+
+
+def link_text(headings: HeadingTable, link: Tag, anchors: dict) -> str:
+    """
+    Text to insert at the start of the content of a link.
+
+    Args:
+        headings (HeadingTable): headings of the page, with their section numbering
+        link (Tag): link start tag
+        anchors (dict): indexes of the headings by href, see `HTMLPage._anchor_index()`
+
+    Returns:
+        str: section numbers of the headings the link refers to, or "" if there are none
+    """
+    if "headerlink" in (link.get("class") or "").split():
+        # This avoids enumerating permalinks
+        return ""
+    # Every number is inserted at the start of the content, so the number of the last heading ends up first
+    return "".join(
+        headings.section_number_string(index) + " "
+        for index in reversed(anchors.get(link.get("href"), []))
+    )
+
+
+class TagScanner(HTMLParser):
+    """
+    Collects heading tags and links with a href, in document order.
+    """
+
+    def __init__(self, content: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self.headings = []
+        self.links = []
+        # Offset of the start of each line, as HTMLParser reports (line, column)
+        self._line_offsets = [0]
+        position = content.find("\n")
+        while position != -1:
+            self._line_offsets.append(position + 1)
+            position = content.find("\n", position + 1)
+
+        self.feed(content)
+        self.close()
+
+    def handle_starttag(self, tag, attrs, selfclosing=False):
+        if tag in HEADING_TAGS:
+            self.headings.append(self._make_tag(tag, attrs, selfclosing))
+        elif tag == "a":
+            attrs = dict(attrs)
+            if attrs.get("href") is not None:
+                self.links.append(self._make_tag(tag, attrs, selfclosing))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, selfclosing=True)
+
+    def _make_tag(self, tag, attrs, selfclosing):
+        line, column = self.getpos()
+        start = self._line_offsets[line - 1] + column
+        end = start + len(self.get_starttag_text())
+        return Tag(tag, dict(attrs), start, end, selfclosing)
+
+
+class StreamHTMLPage(HTMLPage):
+    def __init__(self, content: str, parser: str = None, fragment: bool = False) -> None:
+        """
+        Args:
+            content (str): HTML page
+            parser (str): Not used, the page is always tokenized with html.parser
+            fragment (bool): Not used, a fragment is returned as is
+        """
+
+        self.content = content
+        scanner = TagScanner(content)
+        self.links = scanner.links
+        self.headings = HeadingTable(scanner.headings, None)
+        self._find_section_numbering()
+
+        # Strings to insert at the start of the content of a tag
+        self.insertions: Dict[Tag, List[str]] = {}
+
+    def __str__(self):
+        parts = []
+        position = 0
+        for tag in sorted(self.insertions, key=lambda t: t.start):
+            # Every insert happens at the start of the content of the tag,
+            # so the last insertion ends up first
+            text = "".join(reversed(self.insertions[tag]))
+            if tag.selfclosing:
+                starttag = self.content[tag.start : tag.end]
+                parts.append(self.content[position : tag.start])
+                parts.append(starttag[:-2].rstrip() + ">" + text + "</%s>" % tag.name)
+            else:
+                parts.append(self.content[position : tag.end])
+                parts.append(text)
+            position = tag.end
+        parts.append(self.content[position:])
+        return "".join(parts)
+
+    def enumerate_headings(self, add_span_element: bool = True):
+        """
+        Adds section numbering to all headings in all pages.
+
+        Args:
+            add_span_element (bool): Wrap numbering with <span class='enumerate-heading-plugin'></span>. Defaults to True.
+        """
+        for index, tag in enumerate(self.headings.elements):
+            self._insert(tag, heading_text(self.headings, index, add_span_element))
+
+    def enumerate_toc(self, depth: int = 0):
+        if depth < 1:
+            return
+
+        anchors = self._anchor_index(depth)
+        for link in self.links:
+            text = link_text(self.headings, link, anchors)
+            if text:
+                self._insert(link, text)
+
+    def _insert(self, tag: Tag, text: str) -> None:
+        self.insertions.setdefault(tag, []).append(text)
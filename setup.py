@@ -31,6 +31,9 @@ setup(
     entry_points={
         "mkdocs.plugins": [
             "enumerate-headings=mkdocs_enumerate_headings_plugin.plugin:EnumerateHeadingsPlugin",
-        ]
+        ],
+        "console_scripts": [
+            "enumerate-headings-validate=mkdocs_enumerate_headings_plugin.cli:main",
+        ],
     },
 )
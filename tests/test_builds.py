@@ -20,13 +20,18 @@ os.mkdir(tmp_path)
 
 import re
 import os
+import json
 import shutil
 import logging
 import pytest
 import sys
+from bs4 import BeautifulSoup
 from click.testing import CliRunner
 from mkdocs.__main__ import build_command
 
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+from mkdocs_enumerate_headings_plugin.plugin import ENGINES
+
 
 def setup_clean_mkdocs_folder(mkdocs_yml_path, output_path):
     """
@@ -122,6 +127,222 @@ def test_simple_notstrict(tmp_path):
     check_text_in_page(tmp_proj, "zero_h1.html", r"5.0.0.1</span> Zero h1")
 
 
+def test_simple_prescan_markdown(tmp_path):
+
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_prescan.yml")
+
+    check_text_in_page(tmp_proj, "index.html", r"1.</span> Homepage")
+    check_text_in_page(tmp_proj, "a_third_page.html", r"2.</span> Normal")
+    check_text_in_page(tmp_proj, "two_h1.html", r"3.</span> Two h1")
+    check_text_in_page(tmp_proj, "two_h1.html", r"4.</span> Second level 1 heading")
+    check_text_in_page(tmp_proj, "zero_h1.html", r"5.0.0.1</span> Zero h1")
+
+
+def test_simple_cache(tmp_path):
+
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_cache.yml")
+    cache_file = tmp_proj / ".cache/plugin/enumerate-headings/h1_counts.json"
+    assert cache_file.exists()
+    cold = (tmp_proj / "site/two_h1.html").read_text(encoding="utf-8")
+
+    # Warm build uses the cache, and should give the same numbering
+    result = build_docs_setup(tmp_proj)
+    assert result.exit_code == 0, result
+    warm = (tmp_proj / "site/two_h1.html").read_text(encoding="utf-8")
+    assert re.search(r"4.</span> Second level 1 heading", warm)
+    assert cold == warm
+
+
+def test_simple_output_cache(tmp_path, monkeypatch):
+    # Pages of the mkdocs theme contain the build date, unless it is fixed
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "0")
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_output_cache.yml")
+    cache_dir = tmp_proj / ".cache/plugin/enumerate-headings/output"
+    # zero_h1.md does not start with a heading 1 and is never cached
+    assert len(list(cache_dir.glob("*.html"))) == 3
+    cold = {p.name: p.read_text(encoding="utf-8") for p in (tmp_proj / "site").glob("*.html")}
+
+    parsed = []
+
+    class CountingHTMLPage(HTMLPage):
+        def __init__(self, content, parser="html.parser", fragment=False):
+            parsed.append(content)
+            super().__init__(content, parser, fragment)
+
+    monkeypatch.setitem(ENGINES, "beautifulsoup", CountingHTMLPage)
+    result = build_docs_setup(tmp_proj)
+    assert result.exit_code == 0, result
+    warm = {p.name: p.read_text(encoding="utf-8") for p in (tmp_proj / "site").glob("*.html")}
+    assert warm == cold
+    assert len(parsed) == 1
+
+
+def test_simple_deferred(tmp_path, monkeypatch):
+    # Pages of the mkdocs theme contain the build date, unless it is fixed
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "0")
+    serial = check_build(tmp_path / "serial", "simple/mkdocs_notstrict.yml")
+    deferred = check_build(tmp_path / "deferred", "simple/mkdocs_deferred.yml")
+
+    pages = sorted(p.relative_to(serial / "site") for p in (serial / "site").rglob("*.html"))
+    assert pages
+    for page in pages:
+        assert (deferred / "site" / page).read_bytes() == (serial / "site" / page).read_bytes()
+
+
+def test_simple_deferred_chunked(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "0")
+    serial = check_build(tmp_path / "serial", "simple/mkdocs_stream.yml")
+    # All pages are larger than the chunk size of 1 KB
+    chunked = check_build(tmp_path / "chunked", "simple/mkdocs_deferred_chunked.yml")
+
+    pages = sorted(p.relative_to(serial / "site") for p in (serial / "site").rglob("*.html"))
+    for page in pages:
+        assert (chunked / "site" / page).read_bytes() == (serial / "site" / page).read_bytes()
+
+
+def test_simple_page_content(tmp_path):
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_page_content.yml")
+
+    check_text_in_page(tmp_proj, "index.html", r"1.</span> Homepage")
+    check_text_in_page(tmp_proj, "index.html", r"1.2.1</span> sub heading three deep")
+    check_text_in_page(tmp_proj, "zero_h1.html", r"5.0.0.1</span> Zero h1")
+    # The theme renders the numbered titles of page.toc
+    check_text_in_page(tmp_proj, "index.html", r'href="#another-heading" class="nav-link">1.1 another heading<')
+    # The search plugin indexes the numbered content
+    check_text_in_page(tmp_proj, "search/search_index.json", r'"title":"1.2 Some section"')
+
+
+def test_simple_dirty(tmp_path, monkeypatch):
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_notstrict.yml")
+    site = tmp_proj / "site"
+    check_text_in_page(tmp_proj, "a_third_page.html", r"2.</span> Normal")
+
+    # A second heading 1 on the first page shifts the chapters of all later pages
+    index = tmp_proj / "docs" / "index.md"
+    index.write_text("# Extra chapter\n\n" + index.read_text(encoding="utf-8"), encoding="utf-8")
+    future = os.path.getmtime(site / "index.html") + 10
+    os.utime(index, (future, future))
+
+    monkeypatch.chdir(tmp_proj)
+    result = CliRunner().invoke(build_command, ["--dirty"])
+    assert result.exit_code == 0, result
+    check_text_in_page(tmp_proj, "a_third_page.html", r"3.</span> Normal")
+    check_text_in_page(tmp_proj, "zero_h1.html", r"6.0.0.1</span> Zero h1")
+
+    # Pages whose source and chapter did not change are not rebuilt
+    pages = ["a_third_page.html", "two_h1.html", "zero_h1.html"]
+    mtimes = [(site / page).stat().st_mtime_ns for page in pages]
+    result = CliRunner().invoke(build_command, ["--dirty"])
+    assert result.exit_code == 0, result
+    assert [(site / page).stat().st_mtime_ns for page in pages] == mtimes
+
+
+def test_simple_dirty_other_site_dir(tmp_path, monkeypatch):
+    # Like the language builds of a multi-language site, to another site directory
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_notstrict.yml")
+    site = tmp_proj / "site"
+    monkeypatch.chdir(tmp_proj)
+    for arguments in (["--dirty"], ["--dirty", "--site-dir", "site_fr"]):
+        result = CliRunner().invoke(build_command, arguments)
+        assert result.exit_code == 0, result
+
+    # The table of the first site directory is still used
+    pages = ["a_third_page.html", "two_h1.html", "zero_h1.html"]
+    mtimes = [(site / page).stat().st_mtime_ns for page in pages]
+    result = CliRunner().invoke(build_command, ["--dirty"])
+    assert result.exit_code == 0, result
+    assert [(site / page).stat().st_mtime_ns for page in pages] == mtimes
+
+
+def test_simple_export_headings(tmp_path):
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_export_headings.yml")
+    index = json.loads((tmp_proj / "site/data/headings.json").read_text(encoding="utf-8"))
+
+    assert [page["src_path"] for page in index["pages"]] == [
+        "index.md",
+        "two_h1.md",
+        "a_third_page.md",
+    ]
+    assert index["pages"][0]["url"] == "index.html"
+    headings = index["pages"][0]["headings"]
+    assert headings[0] == ["homepage", 1, "1."]
+    assert ["another-heading", 2, "1.1"] in headings
+    sections = [section for page in index["pages"] for _, _, section in page["headings"]]
+    assert "4." in sections
+
+
+def test_simple_export_headings_dirty(tmp_path, monkeypatch):
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_export_headings.yml")
+    path = tmp_proj / "site/data/headings.json"
+    full = json.loads(path.read_text(encoding="utf-8"))
+
+    # Only index.md is rebuilt, the headings of the other pages come from the previous build
+    monkeypatch.chdir(tmp_proj)
+    for _ in range(2):
+        index = tmp_proj / "docs" / "index.md"
+        future = os.path.getmtime(tmp_proj / "site" / "index.html") + 10
+        os.utime(index, (future, future))
+        result = CliRunner().invoke(build_command, ["--dirty"])
+        assert result.exit_code == 0, result
+        assert json.loads(path.read_text(encoding="utf-8")) == full
+
+
+def test_simple_search_index(tmp_path):
+    # The search plugin is defined after this plugin, but writes its index first
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_search_index.yml")
+    index = json.loads((tmp_proj / "site/search/search_index.json").read_text(encoding="utf-8"))
+    titles = {doc["location"]: doc["title"] for doc in index["docs"]}
+
+    assert titles["index.html#homepage"] == "1. Homepage"
+    assert titles["index.html#another-heading"] == "1.1 another heading"
+    assert titles["two_h1.html#second-level-1-heading"] == "4. Second level 1 heading"
+    # Page entries keep their title
+    assert titles["index.html"] == "Homepage"
+
+
+def test_simple_stream_engine(tmp_path):
+
+    stream_proj = check_build(tmp_path / "stream", "simple/mkdocs_stream.yml")
+    soup_proj = check_build(tmp_path / "soup", "simple/mkdocs_notstrict.yml")
+
+    for page in ["index.html", "a_third_page.html", "two_h1.html", "zero_h1.html"]:
+        stream = (stream_proj / "site" / page).read_text(encoding="utf-8")
+        soup = (soup_proj / "site" / page).read_text(encoding="utf-8")
+        stream = str(BeautifulSoup(stream, "html.parser"))
+        # Ignore build date in html comment
+        assert re.sub("Build Date.*", "", stream) == re.sub("Build Date.*", "", soup)
+
+    check_text_in_page(stream_proj, "zero_h1.html", r"5.0.0.1</span> Zero h1")
+
+
+def test_simple_lxml_parser(tmp_path):
+    pytest.importorskip("lxml")
+
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_lxml.yml")
+    check_text_in_page(tmp_proj, "index.html", r"1.</span> Homepage")
+    check_text_in_page(tmp_proj, "index.html", r"1.2.1</span> sub heading three deep")
+    check_text_in_page(tmp_proj, "index.html", r"""href="#another-heading">1.1 another heading</a>""")
+    check_text_in_page(tmp_proj, "zero_h1.html", r"5.0.0.1</span> Zero h1")
+
+
+def test_simple_profile(tmp_path):
+    tmp_proj = check_build(tmp_path, "simple/mkdocs_profile.yml")
+    check_text_in_page(tmp_proj, "index.html", r"1.</span> Homepage")
+
+    report_path = tmp_proj / ".cache/plugin/enumerate-headings/profile.json"
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["pages"] == 4
+    assert report["totals"]["on_nav.render"] > 0
+    assert set(report["percentiles"]) >= {
+        "on_post_page",
+        "on_post_page.parse",
+        "on_post_page.number",
+        "on_post_page.toc",
+        "on_post_page.serialize",
+    }
+    assert report["slowest_pages"][0]["on_post_page"] >= report["slowest_pages"][-1]["on_post_page"]
+
+
 def test_simple_with_nav(tmp_path):
 
     tmp_proj = check_build(tmp_path, "simple/mkdocs_with_nav.yml")
@@ -280,6 +501,29 @@ def test_compatibility_material(tmp_path):
     assert re.search(r"4.</span> YAML Title", contents)
 
 
+def test_compatibility_material_regions(tmp_path):
+    tmp_proj = check_build(tmp_path, "material/mkdocs_regions.yml")
+
+    check_text_in_page(tmp_proj, "index.html", r"1.</span> Heading 1")
+    check_text_in_page(tmp_proj, "01.Introduction/My-Page-Name.html", r"4.</span> YAML Title")
+    check_text_in_page(tmp_proj, "index.html", r'href="#target-audience-and-goals">1.1 ')
+    # Theme chrome outside of the content and toc regions is left untouched
+    check_text_in_page(tmp_proj, "index.html", r">\s*Skip to content\s*<")
+
+
+def test_compatibility_material_page_content(tmp_path):
+    # Material inserts a heading 1 on pages without one, also in strict mode
+    tmp_proj = check_build(tmp_path, "material/mkdocs_page_content.yml")
+
+    check_text_in_page(tmp_proj, "index.html", r"1.</span> Heading 1")
+    check_text_in_page(tmp_proj, "01.Introduction/Empty-File.html", r"2.</span> Empty File")
+    check_text_in_page(tmp_proj, "01.Introduction/Missing-Heading-1.html", r"3.</span> Missing Heading 1")
+    check_text_in_page(tmp_proj, "01.Introduction/My-Page-Name.html", r"4.</span> YAML Title")
+    # The theme does not insert a second heading 1
+    page = (tmp_proj / "site/01.Introduction/Missing-Heading-1.html").read_text(encoding="utf-8")
+    assert len(re.findall(r"<h1", page)) == 1
+
+
 def test_compatibility_pymarkx_snippets1(tmp_path):
 
     tmp_proj = setup_clean_mkdocs_folder(
@@ -310,6 +554,27 @@ def test_compatibility_pymarkx_snippets2(tmp_path):
     check_text_in_page(tmp_proj, "snippet.html", r"2.</span> Extra page")
 
 
+def test_compatibility_pymarkx_snippets_prescan(tmp_path):
+
+    # snippet.md cannot be scanned and is rendered instead
+    tmp_proj = check_build(tmp_path, "pymarkx_snippet/mkdocs_prescan.yml")
+    check_text_in_page(tmp_proj, "snippet.html", r"2.</span> Extra page")
+    check_text_in_page(tmp_proj, "page.html", r"3.</span> Another page")
+
+
+def test_compatibility_pymarkx_snippets_cache(tmp_path):
+
+    tmp_proj = check_build(tmp_path, "pymarkx_snippet/mkdocs_cache.yml")
+    check_text_in_page(tmp_proj, "page.html", r"3.</span> Another page")
+
+    # A warm build sees changes to included files, same as a cold build
+    extra_page = tmp_proj / "extra_page.md"
+    extra_page.write_text(extra_page.read_text(encoding="utf-8") + "\n\n# Second extra\n", encoding="utf-8")
+    result = build_docs_setup(tmp_proj)
+    assert result.exit_code == 0, result
+    check_text_in_page(tmp_proj, "page.html", r"4.</span> Another page")
+
+
 def test_simple_with_empty_pages(tmp_path):
     tmp_proj = check_build(tmp_path, "simple_with_empty_pages/mkdocs.yml")
 
@@ -0,0 +1,170 @@
+import os
+import json
+
+from mkdocs_enumerate_headings_plugin import cache as cache_module
+from mkdocs_enumerate_headings_plugin.cache import ChapterTable, H1Cache, OutputCache, StructureCache
+from mkdocs_enumerate_headings_plugin.heading import HeadingRecord
+
+
+def test_h1_cache_roundtrip(tmp_path):
+    path = str(tmp_path / "h1_counts.json")
+
+    cache = H1Cache(path, "fingerprint")
+    cache.load()
+    assert cache.get("a.md", "# a") is None
+    cache.set("a.md", "# a", 1)
+    cache.set("b.md", "# b\n# c", 2)
+    cache.save()
+
+    cache = H1Cache(path, "fingerprint")
+    cache.load()
+    assert cache.get("a.md", "# a") == 1
+    assert cache.get("b.md", "# b\n# c") == 2
+    # Changed source
+    assert cache.get("a.md", "# a\n# d") is None
+
+
+def test_h1_cache_fingerprint(tmp_path):
+    path = str(tmp_path / "h1_counts.json")
+
+    cache = H1Cache(path, "fingerprint")
+    cache.set("a.md", "# a", 1)
+    cache.save()
+
+    cache = H1Cache(path, "other markdown config")
+    cache.load()
+    assert cache.get("a.md", "# a") is None
+
+
+def test_h1_cache_evicts_stale_entries(tmp_path):
+    path = str(tmp_path / "h1_counts.json")
+
+    cache = H1Cache(path, "fingerprint")
+    cache.set("a.md", "# a", 1)
+    cache.set("b.md", "# b", 1)
+    cache.save()
+
+    # b.md is no longer part of the site
+    cache = H1Cache(path, "fingerprint")
+    cache.load()
+    cache.get("a.md", "# a")
+    cache.save()
+
+    with open(path) as f:
+        assert list(json.load(f)["pages"]) == ["a.md"]
+
+
+def test_h1_cache_skips_includes(tmp_path):
+    path = str(tmp_path / "h1_counts.json")
+    source = '# a\n\n--8<-- "other.md"'
+
+    cache = H1Cache(path, "fingerprint")
+    cache.set("a.md", "# a", 1)
+    # The included file can change without changing the source
+    cache.set("a.md", source, 1)
+    assert cache.get("a.md", source) is None
+    cache.save()
+
+    with open(path) as f:
+        assert json.load(f)["pages"] == {}
+
+
+def test_output_cache_roundtrip(tmp_path):
+    cache = OutputCache(str(tmp_path / "output"), "fingerprint", max_size=1024)
+    key = cache.key("<h1>a</h1>", 1)
+    assert cache.get(key) is None
+    cache.set(key, "<h1>1. a</h1>\n", [HeadingRecord("a", 1, "1.")])
+    assert cache.get(key) == ("<h1>1. a</h1>\n", [HeadingRecord("a", 1, "1.")])
+
+    # Chapter, output and configuration are all part of the key
+    assert cache.key("<h1>a</h1>", 2) != key
+    assert cache.key("<h1>b</h1>", 1) != key
+    assert OutputCache(str(tmp_path / "output"), "other", 1024).key("<h1>a</h1>", 1) != key
+
+
+def test_output_cache_evicts_least_recently_used(tmp_path):
+    cache = OutputCache(str(tmp_path / "output"), "fingerprint", max_size=250)
+    keys = [cache.key("page %s" % i, 1) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set(key, "x" * 100, [])
+        path = os.path.join(cache.directory, key + ".html")
+        os.utime(path, (1000 + i, 1000 + i))
+
+    # Using the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    assert cache.evict() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+def test_plugin_fingerprint_without_importlib_metadata(monkeypatch):
+    # Python 3.7 without the importlib_metadata backport
+    monkeypatch.setattr(cache_module, "importlib_metadata", None)
+    assert cache_module.plugin_fingerprint({"toc_depth": 1}, "html.parser") != cache_module.plugin_fingerprint(
+        {"toc_depth": 2}, "html.parser"
+    )
+
+
+def test_chapter_table(tmp_path):
+    path = str(tmp_path)
+
+    table = ChapterTable(path, "fingerprint", "site")
+    assert table.load() is None
+    table.save(
+        {"index.md": 1, "a.md": 2},
+        {"index.md": [HeadingRecord("home", 1, "1.")]},
+        {"index.md": "index.html", "a.md": "a.html"},
+    )
+    chapters, headings = table.load()
+    assert chapters == {"index.md": 1, "a.md": 2}
+    assert headings == {"index.md": ("index.html", [("home", 1, "1.")])}
+    assert isinstance(headings["index.md"][1][0], HeadingRecord)
+
+    # Only valid for the same configuration and site directory
+    assert ChapterTable(path, "other config", "site").load() is None
+    assert ChapterTable(path, "fingerprint", "other_site").load() is None
+
+    table.clear()
+    assert table.load() is None
+    table.clear()
+
+
+def test_chapter_table_per_site_dir(tmp_path):
+    # The languages of a multi-language site are built to different site directories
+    english = ChapterTable(str(tmp_path), "fingerprint", "site")
+    french = ChapterTable(str(tmp_path), "fingerprint", "site/fr")
+    english.save({"index.md": 1}, {}, {})
+    french.save({"index.fr.md": 1}, {}, {})
+
+    assert english.load() == ({"index.md": 1}, {})
+    assert french.load() == ({"index.fr.md": 1}, {})
+
+    french.clear()
+    assert english.load() == ({"index.md": 1}, {})
+
+
+def test_structure_cache():
+    StructureCache.clear()
+    cache = StructureCache("fingerprint", ["fr", "de"])
+    assert cache.neutral_path("fr/sub/page.md") == "sub/page.md"
+    assert cache.neutral_path("sub/page.de.md") == "sub/page.md"
+    assert cache.neutral_path("nl/page.nl.md") == "nl/page.nl.md"
+    assert cache.neutral_path("fr.md") == "fr.md"
+
+    cache.set("sub/page.md", "# a\n# b", 2)
+    assert cache.get_path("fr/sub/page.md") == 2
+    assert cache.get_source("# a\n# b") == 2
+    assert cache.get_source("# a") is None
+
+    # Only for the same markdown configuration and marked languages
+    assert StructureCache("other", ["fr"]).get_path("fr/sub/page.md") is None
+    assert StructureCache("fingerprint", []).get_path("sub/page.md") is None
+    # Pages of the default language are always counted
+    assert cache.get_path("sub/page.md") is None
+
+    # Pages that include other files are never cached
+    cache.set("snippet.md", '--8<-- "other.md"', 1)
+    assert cache.get_source('--8<-- "other.md"') is None
+
+    StructureCache.clear()
@@ -0,0 +1,61 @@
+import glob
+import tracemalloc
+
+import pytest
+
+from mkdocs_enumerate_headings_plugin.chunked_page import ChunkedHTMLPage
+from mkdocs_enumerate_headings_plugin.stream_html_page import StreamHTMLPage
+from tests.test_html_page import load_page
+from tests.test_stream_html_page import THEMED_PAGE
+
+
+def enumerate_page(page, chapter=1, toc_depth=6):
+    page.set_page_chapter(chapter)
+    page.enumerate_headings()
+    page.enumerate_toc(depth=toc_depth)
+    return page
+
+
+def write_page(tmp_path, content):
+    path = tmp_path / "page.html"
+    path.write_text(content, encoding="utf-8", newline="")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64, 1024 * 1024])
+@pytest.mark.parametrize("toc_depth", [0, 6])
+def test_same_output_as_stream(tmp_path, chunk_size, toc_depth):
+    # Chunk boundaries fall inside tags, attributes, comments and scripts
+    contents = [THEMED_PAGE, THEMED_PAGE.replace("\n", "\r\n")]
+    contents += [load_page(path) for path in sorted(glob.glob("tests/fixtures/pages/*.md"))]
+    for content in contents:
+        path = write_page(tmp_path, content)
+        expected = enumerate_page(StreamHTMLPage(content), 3, toc_depth)
+        result = enumerate_page(ChunkedHTMLPage(path, chunk_size), 3, toc_depth)
+        assert str(result) == str(expected)
+        assert result.headings.records() == expected.headings.records()
+
+
+def test_bounded_memory(tmp_path):
+    # A table of contents with links to all headings, followed by long sections
+    n = 200
+    section = "<p>%s</p>\n" % ("Some text. " * 1000)
+    body = "".join('<h2 id="h%s">Heading %s</h2>\n%s' % (i, i, section) for i in range(n))
+    toc = "".join('<a href="#h%s">h%s</a>\n' % (i, i) for i in range(n))
+    path = write_page(tmp_path, "<nav>%s</nav><h1 id='top'>Top</h1>%s" % (toc, body))
+    out_path = tmp_path / "out.html"
+
+    tracemalloc.start()
+    page = enumerate_page(ChunkedHTMLPage(path, 16 * 1024))
+    with open(str(out_path), "w", encoding="utf-8", newline="") as f:
+        page.write(f)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Memory depends on the chunk size and the number of headings, not on the size of the page
+    size = out_path.stat().st_size
+    assert size > 2 * 1024 * 1024
+    assert peak < size / 4
+    result = out_path.read_text(encoding="utf-8")
+    assert '<a href="#h199">1.200 h199</a>' in result
+    assert "1.200</span> Heading 199</h2>" in result
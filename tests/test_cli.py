@@ -0,0 +1,50 @@
+import re
+
+from mkdocs_enumerate_headings_plugin.cli import main
+
+
+def test_validate_simple(capsys):
+    assert main(["-f", "tests/fixtures/projects/simple/mkdocs_notstrict.yml", "-w", "2"]) == 1
+    out = capsys.readouterr().out
+
+    chapters = re.findall(r"^\s+(\d+)  (\S+)$", out, re.MULTILINE)
+    assert chapters == [
+        ("1", "index.md"),
+        ("2", "a_third_page.md"),
+        ("3", "two_h1.md"),
+        ("5", "zero_h1.md"),
+    ]
+    assert "ERROR: The first heading on 'zero_h1.md' is level 4" in out
+    assert "4 pages checked (0 rendered), 1 problems" in out
+
+
+def test_validate_material(capsys):
+    # Material inserts a heading 1 on pages without one
+    assert main(["-f", "tests/fixtures/projects/material/mkdocs.yml", "-w", "1"]) == 0
+    assert "0 problems" in capsys.readouterr().out
+
+
+def test_validate_renders_unclassifiable_pages(capsys):
+    assert main(["-f", "tests/fixtures/projects/pymarkx_snippet/mkdocs.yml"]) == 0
+    out = capsys.readouterr().out
+    assert re.search(r"[1-9]\d* rendered", out)
+
+
+def test_validate_applies_nav_plugins(capsys):
+    # awesome-pages reorders the navigation with .pages files
+    assert main(["-f", "tests/fixtures/projects/awesome_pages/mkdocs.yml"]) == 0
+    chapters = re.findall(r"^\s+(\d+)  (\S+)$", capsys.readouterr().out, re.MULTILINE)
+    assert chapters[0] == ("1", "section2/page4.md")
+    assert chapters[-1] == ("5", "index.md")
+
+    # monorepo resolves !include in the navigation
+    assert main(["-f", "tests/fixtures/projects/monorepo_ok/mkdocs.yml"]) == 0
+    chapters = re.findall(r"^\s+(\d+)  (\S+)$", capsys.readouterr().out, re.MULTILINE)
+    assert ("2", "test/README.md") in chapters
+
+
+def test_validate_without_plugin(tmp_path, capsys):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "mkdocs.yml").write_text("site_name: test\n")
+    assert main(["-f", str(tmp_path / "mkdocs.yml")]) == 2
+    assert "plugin is not enabled" in capsys.readouterr().err
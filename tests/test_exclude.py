@@ -0,0 +1,40 @@
+import pytest
+
+from mkdocs_enumerate_headings_plugin.exclude import GlobMatcher, matches_nix_path
+
+GLOBS = [
+    [],
+    ["*"],
+    ["index.md"],
+    ["subfolder/*", "*.ipynb"],
+    ["folder/page?.md", "[ab]*.md", "**/deep.md"],
+]
+
+PATHS = [
+    "index.md",
+    "other.md",
+    "subfolder/page.md",
+    "subfolder/nested/page.md",
+    "notebook.ipynb",
+    "folder/page1.md",
+    "folder/page10.md",
+    "a_third_page.md",
+    "b.md",
+    "some/where/deep.md",
+]
+
+
+@pytest.mark.parametrize("globs", GLOBS)
+def test_same_as_matches_nix_path(globs):
+    matcher = GlobMatcher(globs)
+    for path in PATHS:
+        assert matcher(path) == matches_nix_path(path, globs), path
+        # Memoized result
+        assert matcher(path) == matches_nix_path(path, globs), path
+
+
+def test_many_globs():
+    globs = ["section-%s/*.md" % i for i in range(500)]
+    matcher = GlobMatcher(globs)
+    assert matcher("section-499/page.md")
+    assert not matcher("section-500/page.md")
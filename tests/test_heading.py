@@ -1,9 +1,10 @@
 import re
+from array import array
 import pytest
 
 from bs4 import BeautifulSoup
 
-from mkdocs_enumerate_headings_plugin.heading import Heading
+from mkdocs_enumerate_headings_plugin.heading import Heading, HeadingTable
 
 
 def get_heading_class(content: str):
@@ -60,3 +61,33 @@ def test_reference_error1():
     heading = get_heading_class("<h1>dummy test</h1>")
     with pytest.raises(AssertionError):
         heading.enumerate()
+
+
+def test_heading_table():
+    soup = BeautifulSoup('<h1 id="a">a</h1><h3>b</h3><h2 id="c">c</h2>', "html.parser")
+    table = HeadingTable(soup.find_all(re.compile("^h[1-6]$")), soup)
+
+    assert len(table) == 3
+    assert list(table.depths) == [1, 3, 2]
+    assert table.anchors == ["#a", None, "#c"]
+    assert [h.anchorlink for h in table] == ["#a", None, "#c"]
+
+    # Views share the numbering buffer of the table
+    table[1].section_numbering = [1, 0, 1, 0, 0, 0]
+    assert table.numbering[6:12].tolist() == [1, 0, 1, 0, 0, 0]
+    table.set_chapter(3)
+    assert table[1].section_number_string() == "3.0.1"
+    assert table[-1].section_numbering == [3, 0, 0, 0, 0, 0]
+
+    # Views are slotted
+    with pytest.raises(AttributeError):
+        table[0].extra = 1
+
+
+def test_heading_table_records():
+    soup = BeautifulSoup('<h1 id="a">a</h1><h3>b</h3><h2 id="c">c</h2>', "html.parser")
+    table = HeadingTable(soup.find_all(re.compile("^h[1-6]$")), soup)
+    table.numbering = array("I", [1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 1, 0, 0, 0, 0])
+    table.set_chapter(2)
+
+    assert table.records() == [("a", 1, "2."), (None, 3, "2.0.1"), ("c", 2, "2.1")]
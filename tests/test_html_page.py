@@ -2,6 +2,7 @@ import pytest
 import markdown
 import logging
 from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+from mkdocs_enumerate_headings_plugin.heading import HeadingTable
 from bs4 import BeautifulSoup
 
 
@@ -80,3 +81,56 @@ def test_enumeration(pagename, valid, caplog):
     reference_html_page = load_page("tests/fixtures/pages/%s-enumerated.md" % pagename)
     soup = BeautifulSoup(reference_html_page, "html.parser")
     assert str(html_page) == str(soup)
+
+
+def enumerate_toc_nested_loop(html_page, depth):
+    """
+    Reference implementation of HTMLPage.enumerate_toc, looping over all links for each heading.
+    """
+    links = html_page.soup.find_all("a", href=True)
+    for heading in html_page.headings:
+        for link in links:
+            if "headerlink" in link.get("class", []):
+                continue
+            if link.get("href") == heading.anchorlink and heading.depth <= depth:
+                link.insert(0, " ")
+                link.insert(0, heading.section_number_string())
+
+
+TOC_PAGE = """
+<nav>
+<a href="#a">a</a><a href="#b">b</a><a href="#dup">dup</a><a class="headerlink" href="#a">x</a>
+<a href="#c">c</a><a href="#">empty</a><a href="other.html#a">other</a><a href="#dup">dup again</a>
+</nav>
+<h1 id="a">a<a class="headerlink" href="#a">¶</a></h1>
+<h2 id="b">b</h2><h3 id="c">c</h3><h2 id="dup">dup</h2><h4 id="dup">dup</h4><h2>no id</h2>
+"""
+
+
+@pytest.mark.parametrize("depth", [0, 1, 2, 3, 4, 6])
+def test_enumerate_toc_same_as_nested_loop(depth):
+    expected = HTMLPage(TOC_PAGE)
+    expected.set_page_chapter(2)
+    enumerate_toc_nested_loop(expected, depth)
+
+    html_page = HTMLPage(TOC_PAGE)
+    html_page.set_page_chapter(2)
+    html_page.enumerate_toc(depth)
+    assert str(html_page) == str(expected)
+
+
+def test_enumerate_toc_looks_up_anchors_once(monkeypatch):
+    n = 2000
+    page = "".join('<a href="#h%s">h</a><h2 id="h%s">h</h2>' % (i, i) for i in range(n))
+    html_page = HTMLPage("<h1>top</h1>" + page)
+
+    lookups = []
+    section_number_string = HeadingTable.section_number_string
+    monkeypatch.setattr(
+        HeadingTable,
+        "section_number_string",
+        lambda table, index: lookups.append(index) or section_number_string(table, index),
+    )
+    html_page.enumerate_toc(depth=6)
+    assert len(lookups) == n
+    assert "1.%s h</a>" % n in str(html_page)
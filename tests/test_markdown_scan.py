@@ -0,0 +1,111 @@
+import glob
+import pytest
+import markdown
+from bs4 import BeautifulSoup
+from mkdocs.utils import meta
+
+from mkdocs_enumerate_headings_plugin.markdown_scan import (
+    count_h1s,
+    scan_headings,
+    supports_config,
+)
+
+
+def render_h1s(source, extensions=["toc", "tables", "fenced_code"]):
+    html = markdown.Markdown(extensions=extensions).convert(source)
+    return len(BeautifulSoup(html, "html.parser").find_all("h1"))
+
+
+@pytest.mark.parametrize(
+    "path", sorted(glob.glob("tests/fixtures/**/docs/**/*.md", recursive=True))
+)
+def test_same_count_as_render(path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        source, _ = meta.get_data(f.read())
+
+    h1s = count_h1s(source)
+    if h1s is not None:
+        assert h1s == render_h1s(source)
+
+
+@pytest.mark.parametrize(
+    "source,depths",
+    [
+        ("# one\n\n## two\n\n####### seven", [1, 2, 6]),
+        ("#no space", [1]),
+        ("Title\n=====\n\nSub\n---", [1, 2]),
+        ("text\nmore text\n===", []),
+        ("```python\n# comment\n```\n\n# one", [1]),
+        ("~~~\nTitle\n===\n~~~", []),
+        ("\\# escaped", []),
+        ("# one\ntext\n# two", [1, 1]),
+        ("# T\n\n- item\n\n1. item", [1]),
+    ],
+)
+def test_scan_headings(source, depths):
+    assert scan_headings(source) == depths
+    assert count_h1s(source) == render_h1s(source)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        '--8<-- "snippet.md"',
+        "<div>\n# inside html\n</div>",
+        "para with <h1>raw html</h1>",
+        "- item\n\n    # heading in list",
+        "```\n# unclosed fence",
+        "# T\n\n- # Nested",
+        "1. # x",
+        "- - # x",
+        "> - # quoted",
+        "- item\n\n    - # nested item",
+        "term\n:   # def",
+        "[^1]: # foo",
+        "$$\n# x\n$$",
+    ],
+)
+def test_unclassifiable(source):
+    assert count_h1s(source) is None
+
+
+@pytest.mark.parametrize(
+    "source,extensions,h1s",
+    [
+        ("- item\n\n    Appendix\n    ========\n", ["toc"], 1),
+        ("1. item\n\n    Appendix\n    ========\n", ["toc"], 1),
+        ("- item\n\n    text\n\n    Appendix\n    ========\n", ["toc"], 1),
+        ("!!! note\n\n    Appendix\n    ========\n", ["toc", "admonition"], 1),
+        ("??? note\n\n    Appendix\n    ========\n", ["toc", "pymdownx.details"], 1),
+        ('=== "Tab"\n\n    Appendix\n    ========\n', ["toc", "pymdownx.tabbed"], 1),
+        ("term\n\n:   text\n\n    Appendix\n    ========\n", ["toc", "def_list"], 1),
+        ("# T\n\n$$\n# x\n$$", ["toc", "pymdownx.arithmatex"], 1),
+    ],
+)
+def test_unclassifiable_containers(source, extensions, h1s):
+    # Rendered, these pages have headings the scanner cannot see
+    assert render_h1s(source, extensions) == h1s
+    assert count_h1s(source) is None
+
+
+def test_baselevel():
+    assert scan_headings("# one\n## two", baselevel=2) == [2, 3]
+    assert count_h1s("# one\n## two", baselevel=2) == 0
+
+
+def test_superfences_nested_fence():
+    source = '!!! note\n\n    ```python\n    # comment\n    ```\n\n# one'
+    assert count_h1s(source) is None
+    assert count_h1s(source, superfences=True) == 1
+
+
+def test_supports_config():
+    assert supports_config({"markdown_extensions": ["toc", "tables", "fenced_code"]})
+    assert supports_config({"markdown_extensions": ["markdown.extensions.toc"]})
+    assert not supports_config({"markdown_extensions": ["pymdownx.saneheaders"]})
+    assert not supports_config(
+        {
+            "markdown_extensions": ["pymdownx.snippets"],
+            "mdx_configs": {"pymdownx.snippets": {"auto_append": ["abbr.md"]}},
+        }
+    )
@@ -0,0 +1,68 @@
+import random
+import pytest
+
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+
+
+def reference_section_numbering(headings):
+    """
+    Previous implementation of HTMLPage._find_section_numbering,
+    which looks at each heading depth separately.
+    """
+    for depth in range(1, 7):
+        for i, heading in enumerate(headings):
+            if i == 0:
+                heading.set_section_number(int(heading.depth == depth), depth)
+            elif heading.depth < depth:
+                heading.set_section_number(0, depth)
+            elif heading.depth == depth:
+                previous_section_number = headings[i - 1].get_section_number(depth)
+                heading.set_section_number(previous_section_number + 1, depth)
+            else:
+                previous_section_number = headings[i - 1].get_section_number(depth)
+                heading.set_section_number(previous_section_number, depth)
+
+
+def random_page(seed):
+    rng = random.Random(seed)
+    depths = [rng.randint(1, 6) for _ in range(rng.randint(0, 40))]
+    # Also generate pages that mostly go one level deeper or back up
+    if seed % 2:
+        depths = [rng.randint(1, 6)]
+        for _ in range(rng.randint(0, 40)):
+            depths.append(min(max(depths[-1] + rng.choice([-2, -1, 0, 1, 1]), 1), 6))
+    return "".join("<h%s>heading %s</h%s>" % (d, i, d) for i, d in enumerate(depths))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_same_numbering_as_reference(seed):
+    content = random_page(seed)
+
+    html_page = HTMLPage(content)
+    reference = HTMLPage(content)
+    reference_section_numbering(reference.headings)
+
+    assert [h.section_numbering for h in html_page.headings] == [
+        h.section_numbering for h in reference.headings
+    ]
+
+    for chapter in [1, 4]:
+        html_page.set_page_chapter(chapter)
+        reference.set_page_chapter(chapter)
+        assert [h.section_number_string() for h in html_page.headings] == [
+            h.section_number_string() for h in reference.headings
+        ]
+
+
+@pytest.mark.parametrize(
+    "depths,expected",
+    [
+        ([1, 2, 2, 3, 1, 2], ["1.", "1.1", "1.2", "1.2.1", "2.", "2.1"]),
+        ([1, 3, 2, 3], ["1.", "1.0.1", "1.1", "1.1.1"]),
+        ([2, 3, 1, 2], ["0.1", "0.1.1", "1.", "1.1"]),
+        ([4], ["0.0.0.1"]),
+    ],
+)
+def test_numbering(depths, expected):
+    html_page = HTMLPage("".join("<h%s>x</h%s>" % (d, d) for d in depths))
+    assert [h.section_number_string() for h in html_page.headings] == expected
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+from mkdocs.structure.toc import get_toc
+
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+from mkdocs_enumerate_headings_plugin.page_enumerator import PageEnumerator, enumerate_toc_items
+from mkdocs_enumerate_headings_plugin.profiler import Profiler
+from mkdocs_enumerate_headings_plugin.regions import theme_selectors, parse_selectors
+
+
+PAGE = SimpleNamespace(file=SimpleNamespace(src_path="page.md"), chapter=2)
+
+
+class FailingHTMLPage(HTMLPage):
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("page should not be parsed")
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "<html><body><p>redirecting...</p></body></html>",
+        "<html><body><p>A <hr> and a <header></header></p></body></html>",
+    ],
+)
+def test_skip_without_headings(html):
+    profiler = Profiler()
+    enumerator = PageEnumerator(FailingHTMLPage, "html.parser", 6, True, profiler=profiler)
+
+    output, valid, records = enumerator.enumerate(html, PAGE)
+    assert output is html
+    assert valid
+    assert records == []
+    assert profiler.counts == {"on_post_page.skipped": 1}
+
+
+def test_skip_without_headings_in_content_region():
+    selectors = tuple(
+        parse_selectors(theme_selectors("mkdocs", region)) for region in ("content", "toc")
+    )
+    enumerator = PageEnumerator(FailingHTMLPage, "html.parser", 6, True, selectors)
+    html = '<h4 class="modal-title">Search</h4><div role="main"><p>text</p></div>'
+    assert enumerator.enumerate(html, PAGE) == (html, True, [])
+
+
+def test_enumerate():
+    enumerator = PageEnumerator(HTMLPage, "html.parser", 6, True)
+    output, valid, records = enumerator.enumerate('<H1 id="a">a</H1><h2 id="b">b</h2>', PAGE)
+    assert valid
+    assert records == [("a", 1, "2."), ("b", 2, "2.1")]
+
+
+def test_enumerate_content():
+    enumerator = PageEnumerator(HTMLPage, "html.parser", 6, True)
+    content, valid, records = enumerator.enumerate_content(
+        '<h1 id="a">a</h1><h2 id="b">b</h2><p><a href="#b">b</a></p>', PAGE
+    )
+    assert valid
+    assert "2.1</span> b</h2>" in content
+    assert '<a href="#b">2.1 b</a>' in content
+    assert not content.startswith("<html>")
+
+
+def test_enumerate_toc_items():
+    children = [
+        {"level": 2, "id": "b", "name": "B", "children": []},
+        {"level": 3, "id": "c", "name": "C", "children": []},
+    ]
+    toc = get_toc([{"level": 1, "id": "a", "name": "A", "children": children}])
+    records = [("a", 1, "2."), ("b", 2, "2.1"), ("c", 3, "2.1.1")]
+
+    assert enumerate_toc_items(toc, records, depth=2) == 2
+    (item,) = toc
+    assert [item.title] + [child.title for child in item.children] == ["2. A", "2.1 B", "C"]
+    assert enumerate_toc_items(toc, records, depth=0) == 0
+
+
+def test_enumerate_toc_items_duplicate_anchors():
+    # Like the links in the page, the item gets the numbers of all headings with its anchor
+    toc = get_toc([{"level": 2, "id": "a", "name": "A", "children": []}])
+    records = [("a", 2, "1.1"), ("a", 2, "1.2")]
+
+    assert enumerate_toc_items(toc, records, depth=2) == 1
+    (item,) = toc
+    assert item.title == "1.2 1.1 A"
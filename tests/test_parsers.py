@@ -0,0 +1,50 @@
+import glob
+import pytest
+
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage, resolve_parser
+from tests.test_html_page import load_page
+from tests.test_stream_html_page import THEMED_PAGE
+
+
+def enumerated_text(html):
+    """
+    Returns the text of all headings and links, the parts changed by enumeration.
+    Whitespace is normalized, as parsers differ in how they repair invalid HTML.
+    """
+    page = HTMLPage(html)
+    headings = [(h.depth, h.anchorlink, text(h.heading)) for h in page.headings]
+    links = [(a.get("href"), text(a)) for a in page.soup.find_all("a", href=True)]
+    return headings, links
+
+
+def text(element):
+    return " ".join(element.get_text().split())
+
+
+def enumerate_with(parser, content):
+    page = HTMLPage(content, parser=parser)
+    page.set_page_chapter(2)
+    page.enumerate_headings()
+    page.enumerate_toc(depth=6)
+    return str(page)
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html5lib"])
+@pytest.mark.parametrize(
+    "path", ["themed"] + sorted(glob.glob("tests/fixtures/pages/*.md"))
+)
+def test_equivalent_across_parsers(parser, path):
+    pytest.importorskip(parser)
+    content = THEMED_PAGE if path == "themed" else load_page(path)
+
+    expected = enumerated_text(enumerate_with("html.parser", content))
+    assert enumerated_text(enumerate_with(parser, content)) == expected
+
+
+def test_resolve_parser(monkeypatch):
+    assert resolve_parser("html.parser") == "html.parser"
+    assert resolve_parser("auto") in ["lxml", "html.parser"]
+
+    monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+    assert resolve_parser("auto") == "html.parser"
+    assert resolve_parser("lxml") == "html.parser"
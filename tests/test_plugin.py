@@ -0,0 +1,307 @@
+"""
+Tests that run the plugin events directly, the way `mkdocs serve` does on a rebuild.
+"""
+import os
+import json
+import tracemalloc
+import shutil
+
+from mkdocs.config import load_config
+from mkdocs.structure.files import get_files
+from mkdocs.structure.nav import get_navigation
+
+from mkdocs_enumerate_headings_plugin.cache import StructureCache
+
+
+def load_project(tmp_path, project="simple", config_file="mkdocs.yml"):
+    project_path = tmp_path / project
+    shutil.copytree("tests/fixtures/projects/%s" % project, str(project_path))
+    return project_path, str(project_path / config_file)
+
+
+def run_nav(config_file_path, plugin=None, command="serve"):
+    """
+    Load the configuration and run the plugin up to on_nav.
+
+    Passing the plugin of a previous run reuses that instance,
+    like `mkdocs serve` does for plugins that define `on_startup`.
+    """
+    config = load_config(config_file_path)
+    if plugin is None:
+        plugin = config.plugins["enumerate-headings"]
+        plugin.on_startup(command=command, dirty=False)
+    else:
+        plugin.config = config.plugins["enumerate-headings"].config
+        config.plugins["enumerate-headings"] = plugin
+    config = plugin.on_config(config)
+    files = get_files(config)
+    nav = get_navigation(files, config)
+    plugin.on_nav(nav, config=config, files=files)
+    return plugin, nav
+
+
+def chapters(nav):
+    return {page.file.src_path: page.chapter for page in nav.pages}
+
+
+def test_serve_rescans_only_changed_pages(tmp_path, monkeypatch):
+    project_path, config_file_path = load_project(tmp_path)
+    plugin, nav = run_nav(config_file_path)
+    first = chapters(nav)
+
+    scanned = []
+    find_h1s = plugin._find_h1s
+
+    def counting_find_h1s(page, config, files):
+        scanned.append(page.file.src_path)
+        return find_h1s(page, config, files)
+
+    monkeypatch.setattr(plugin, "_find_h1s", counting_find_h1s)
+
+    # Unchanged sources are not read again
+    plugin, nav = run_nav(config_file_path, plugin)
+    assert scanned == []
+    assert chapters(nav) == first
+
+    # A changed page is scanned again, and shifts the chapters of the pages after it
+    index = project_path / "docs" / "index.md"
+    index.write_text(index.read_text() + "\n\n# Extra chapter\n")
+    stat = os.stat(str(index))
+    os.utime(str(index), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    plugin, nav = run_nav(config_file_path, plugin)
+    assert scanned == ["index.md"]
+    assert chapters(nav) == {
+        path: chapter + (1 if path != "index.md" else 0)
+        for path, chapter in first.items()
+    }
+
+
+def test_serve_rescans_pages_with_includes(tmp_path, monkeypatch):
+    project_path, config_file_path = load_project(
+        tmp_path, "pymarkx_snippet", "mkdocs_with_nav.yml"
+    )
+    # Snippets are included relative to the working directory
+    monkeypatch.chdir(str(project_path))
+    plugin, nav = run_nav(config_file_path)
+    assert chapters(nav)["page.md"] == 3
+
+    # snippet.md did not change, but the file it includes did
+    extra_page = project_path / "extra_page.md"
+    extra_page.write_text(extra_page.read_text() + "\n\n# Second extra\n")
+    plugin, nav = run_nav(config_file_path, plugin)
+    assert chapters(nav)["page.md"] == 4
+
+
+def test_serve_keeps_cache_entries(tmp_path):
+    project_path, config_file_path = load_project(tmp_path)
+    config_file = project_path / "mkdocs_cache.yml"
+    config_file.write_text(
+        "site_name: test\nplugins:\n    - enumerate-headings:\n        cache: true\n"
+    )
+    plugin, _ = run_nav(str(config_file))
+    plugin, _ = run_nav(str(config_file), plugin)
+
+    # Pages reused from the previous rebuild are not evicted from the cache
+    cache_file = project_path / ".cache/plugin/enumerate-headings/h1_counts.json"
+    assert len(json.loads(cache_file.read_text())["pages"]) == 4
+
+
+def test_build_always_scans(tmp_path, monkeypatch):
+    _, config_file_path = load_project(tmp_path)
+    plugin, _ = run_nav(config_file_path, command="build")
+
+    scanned = []
+    monkeypatch.setattr(plugin, "_find_h1s", lambda page, config, files: scanned.append(1) or 1)
+    run_nav(config_file_path, plugin)
+    assert len(scanned) == 4
+
+
+def test_workers_same_chapters_as_serial(tmp_path):
+    project_path, config_file_path = load_project(tmp_path, config_file="mkdocs_workers.yml")
+    # A page the scanner cannot classify is rendered instead
+    (project_path / "docs" / "raw_html.md").write_text("# One\n\n<h1>Two</h1>\n\n# Three\n")
+
+    _, parallel_nav = run_nav(config_file_path, command="build")
+    _, serial_nav = run_nav(str(project_path / "mkdocs_prescan.yml"), command="build")
+
+    assert chapters(parallel_nav) == chapters(serial_nav)
+    assert [page.number_h1s for page in parallel_nav.pages] == [
+        page.number_h1s for page in serial_nav.pages
+    ]
+    assert max(page.number_h1s for page in parallel_nav.pages) == 3
+
+
+def make_large_project(path, n_pages, low_memory):
+    docs = path / "docs"
+    docs.mkdir(parents=True)
+    section = "\n\n".join("## Section %s\n\n%s" % (i, "Some *text* here. " * 20) for i in range(30))
+    for page in range(n_pages):
+        (docs / ("page-%s.md" % page)).write_text("# Page %s\n\n%s" % (page, section))
+    config_file = path / "mkdocs.yml"
+    config_file.write_text(
+        "site_name: memory\nplugins:\n    - enumerate-headings:\n        low_memory: %s\n"
+        % ("true" if low_memory else "false")
+    )
+    return str(config_file)
+
+
+def peak_memory_on_nav(config_file_path):
+    config = load_config(config_file_path)
+    plugin = config.plugins["enumerate-headings"]
+    config = plugin.on_config(config)
+    files = get_files(config)
+    nav = get_navigation(files, config)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        plugin.on_nav(nav, config=config, files=files)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert all(page.content is None and page.markdown is None for page in nav.pages) == (
+        plugin.config["low_memory"]
+    )
+    return peak - baseline
+
+
+def test_low_memory_peak_is_flat(tmp_path):
+    peaks = {}
+    for n_pages in [2, 10]:
+        config_file_path = make_large_project(tmp_path / str(n_pages), n_pages, low_memory=True)
+        peaks[n_pages] = peak_memory_on_nav(config_file_path)
+
+    # Only one rendered page at a time is kept in memory
+    assert peaks[10] < 1.2 * peaks[2]
+
+
+def test_without_low_memory_pages_keep_content(tmp_path):
+    config_file_path = make_large_project(tmp_path, 1, low_memory=False)
+    peak_memory_on_nav(config_file_path)
+
+
+def test_languages_reuse_counts(tmp_path, monkeypatch):
+    # Counts of other tests in this process
+    StructureCache.clear()
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for language, suffix in (("English", ""), ("French", ".fr")):
+        (docs / ("index%s.md" % suffix)).write_text("# %s\n\n# Second\n" % language)
+        (docs / ("page%s.md" % suffix)).write_text("# %s page\n" % language)
+        (tmp_path / ("mkdocs%s.yml" % suffix)).write_text(
+            "site_name: i18n\nnav:\n    - index%s.md\n    - page%s.md\n"
+            "plugins:\n    - enumerate-headings:\n        same_structure_languages: [fr]\n"
+            % (suffix, suffix)
+        )
+
+    plugin, english_nav = run_nav(str(tmp_path / "mkdocs.yml"), command="build")
+
+    scanned = []
+    monkeypatch.setattr(plugin, "_find_h1s", lambda page, config, files: scanned.append(1) or 1)
+    _, french_nav = run_nav(str(tmp_path / "mkdocs.fr.yml"), plugin, command="build")
+
+    assert scanned == []
+    assert [page.chapter for page in french_nav.pages] == [1, 3]
+    assert [page.chapter for page in english_nav.pages] == [1, 3]
+    # The translated pages are not even read
+    assert all(page.markdown is None for page in french_nav.pages)
+
+
+def test_languages_keep_cache_entries(tmp_path):
+    StructureCache.clear()
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for language, suffix in (("English", ""), ("French", ".fr")):
+        (docs / ("index%s.md" % suffix)).write_text("# %s\n\n# Second\n" % language)
+        (docs / ("page%s.md" % suffix)).write_text("# %s page\n" % language)
+        (tmp_path / ("mkdocs%s.yml" % suffix)).write_text(
+            "site_name: i18n\nnav:\n    - index%s.md\n    - page%s.md\n"
+            "plugins:\n    - enumerate-headings:\n        cache: true\n"
+            "        same_structure_languages: [fr]\n" % (suffix, suffix)
+        )
+    cache_file = tmp_path / ".cache/plugin/enumerate-headings/h1_counts.json"
+
+    plugin, _ = run_nav(str(tmp_path / "mkdocs.yml"), command="build")
+    english_entries = json.loads(cache_file.read_text())["pages"]
+    assert len(english_entries) == 2
+
+    # The French build reuses the English counts and does not evict their entries
+    run_nav(str(tmp_path / "mkdocs.fr.yml"), plugin, command="build")
+    assert json.loads(cache_file.read_text())["pages"] == english_entries
+
+
+def test_attach_result(tmp_path):
+    project_path, config_file_path = load_project(tmp_path)
+    config_file = project_path / "mkdocs_attach.yml"
+    config_file.write_text(
+        "site_name: test\nplugins:\n    - enumerate-headings:\n        attach_soup: true\n"
+    )
+    plugin, nav = run_nav(str(config_file), command="build")
+    first, second = nav.pages[:2]
+
+    output = plugin.on_post_page(
+        '<html><body><h1 id="a">A</h1><h2 id="b">B</h2></body></html>', page=first, config={}
+    )
+    assert first.enumerated_headings == [("a", 1, "1."), ("b", 2, "1.1")]
+    assert str(first.enumerated_soup) == output
+
+    # The tree of a page is released when the next page is enumerated
+    plugin.on_post_page("<h1>C</h1>", page=second, config={})
+    assert first.enumerated_soup is None
+    assert second.enumerated_headings == [(None, 1, "2.")]
+    assert second.enumerated_soup is not None
+
+    # And at the end of the build
+    plugin._on_post_build_pages(config={})
+    assert second.enumerated_soup is None
+    assert second.enumerated_headings == [(None, 1, "2.")]
+
+
+def test_deferred_pages_are_enumerated_before_other_post_build_events(tmp_path):
+    _, config_file_path = load_project(tmp_path, config_file="mkdocs_deferred.yml")
+    config = load_config(config_file_path)
+    plugin = config.plugins["enumerate-headings"]
+    events = config.plugins.events["post_build"]
+
+    # Other plugins read enumerated pages, the search index is enumerated after it is written
+    assert events.index(plugin._on_post_build_pages) == 0
+    assert events.index(config.plugins["search"].on_post_build) < events.index(
+        plugin._on_post_build_search_index
+    )
+
+
+def test_serve_rescans_translations(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "index.md").write_text("# Home\n")
+    (docs / "page.md").write_text("# Page\n")
+    (tmp_path / "mkdocs.yml").write_text(
+        "site_name: i18n\nnav:\n    - index.md\n    - page.md\n"
+        "plugins:\n    - enumerate-headings:\n        same_structure_languages: [fr]\n"
+    )
+    plugin, nav = run_nav(str(tmp_path / "mkdocs.yml"))
+    assert chapters(nav)["page.md"] == 2
+
+    # A page of the default language is never taken from the counts of a previous build
+    index = docs / "index.md"
+    index.write_text("# Home\n\n# Extra chapter\n")
+    stat = os.stat(str(index))
+    os.utime(str(index), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    plugin, nav = run_nav(str(tmp_path / "mkdocs.yml"), plugin)
+    assert chapters(nav)["page.md"] == 3
+
+
+def test_post_page_checks_for_headings_once(tmp_path, monkeypatch):
+    _, config_file_path = load_project(tmp_path)
+    plugin, nav = run_nav(config_file_path, command="build")
+
+    checks = []
+    has_headings = plugin.enumerator.has_headings
+    monkeypatch.setattr(
+        plugin.enumerator, "has_headings", lambda output: checks.append(1) or has_headings(output)
+    )
+    plugin.on_post_page('<h1 id="a">A</h1>', page=nav.pages[0], config={})
+    plugin.on_post_page("<p>No headings</p>", page=nav.pages[1], config={})
+    assert len(checks) == 2
@@ -0,0 +1,36 @@
+from mkdocs_enumerate_headings_plugin.profiler import Profiler, percentile
+
+
+def test_percentile():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 99) == 10
+    assert percentile([3], 50) == 3
+    assert percentile([], 50) == 0.0
+
+
+def test_report():
+    profiler = Profiler()
+    for page in ["a.md", "b.md", "c.md"]:
+        with profiler.timer("on_post_page", page=page):
+            with profiler.timer("on_post_page.parse", page=page):
+                sum(range(10000 if page == "b.md" else 10))
+    with profiler.timer("on_nav"):
+        pass
+
+    report = profiler.report(slowest=2)
+    assert report["pages"] == 3
+    assert [page["page"] for page in report["slowest_pages"]][0] == "b.md"
+    assert len(report["slowest_pages"]) == 2
+    # Sections are part of their hook, and not counted twice
+    assert report["total"] == report["totals"]["on_nav"] + report["totals"]["on_post_page"]
+
+
+def test_count():
+    profiler = Profiler()
+    profiler.count("on_post_page.skipped")
+    profiler.count("on_post_page.skipped")
+
+    assert profiler.report()["counts"] == {"on_post_page.skipped": 2}
+    assert "(2 skipped)" in profiler.summary()
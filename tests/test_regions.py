@@ -0,0 +1,74 @@
+import pytest
+
+from mkdocs_enumerate_headings_plugin.regions import (
+    Selector,
+    find_regions,
+    join_regions,
+    parse_selectors,
+    splice_regions,
+    split_regions,
+    without_overlap,
+)
+
+PAGE = """<html><body>
+<div class="header"><h1>Site</h1></div>
+<script>var x = "<div role='main'></div>";</script>
+<!-- <div role="main"> -->
+<div class="row"><div class="col" role="main"><div><h1 id="a">A</h1></div><br/><img src="x.png"/><p>text</p></div></div>
+<nav class="md-nav md-nav--secondary"><a href="#a">A</a></nav>
+</body></html>"""
+
+
+@pytest.mark.parametrize(
+    "selector,name,attrs,matches",
+    [
+        ("div", "div", {}, True),
+        ("div", "nav", {}, False),
+        ("#main", "div", {"id": "main"}, True),
+        (".md-nav--secondary", "nav", {"class": "md-nav md-nav--secondary"}, True),
+        ("nav.md-nav.other", "nav", {"class": "md-nav"}, False),
+        ('div[role="main"]', "div", {"role": "main"}, True),
+        ("div[role=main]", "div", {"role": "navigation"}, False),
+        ("[role]", "section", {"role": ""}, True),
+    ],
+)
+def test_selector(selector, name, attrs, matches):
+    assert Selector(selector).matches(name, attrs) is matches
+
+
+@pytest.mark.parametrize("selector", ["nav > ul", "div p", "", "*"])
+def test_unsupported_selector(selector):
+    with pytest.raises(ValueError):
+        Selector(selector)
+
+
+def test_find_regions():
+    content_regions = find_regions(PAGE, parse_selectors('div[role="main"]'))
+    assert len(content_regions) == 1
+    start, end = content_regions[0]
+    assert PAGE[start:end].startswith('<div class="col" role="main"><div><h1')
+    assert PAGE[start:end].endswith("<p>text</p></div>")
+
+    toc_regions = find_regions(PAGE, parse_selectors("nav.md-nav--secondary, .missing"))
+    assert [PAGE[start:end] for start, end in toc_regions] == [
+        '<nav class="md-nav md-nav--secondary"><a href="#a">A</a></nav>'
+    ]
+
+
+def test_nested_regions_are_not_repeated():
+    assert find_regions("<div><div>x</div></div><div>y</div>", parse_selectors("div")) == [
+        (0, 23),
+        (23, 35),
+    ]
+    assert without_overlap([(0, 10), (10, 20)], [(5, 8)]) == [(10, 20)]
+
+
+def test_splice_regions():
+    regions = find_regions(PAGE, parse_selectors("[role=main], nav"))
+    parts = split_regions(join_regions(PAGE, regions).upper(), regions)
+    assert parts is None
+
+    parts = split_regions(join_regions(PAGE, regions), regions)
+    replacements = [(region, part.replace("A<", "1. A<")) for region, part in zip(regions, parts)]
+    spliced = splice_regions(PAGE, replacements)
+    assert spliced == PAGE.replace("A<", "1. A<")
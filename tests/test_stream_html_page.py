@@ -0,0 +1,80 @@
+import re
+import glob
+import pytest
+from bs4 import BeautifulSoup
+
+from mkdocs_enumerate_headings_plugin.html_page import HTMLPage
+from mkdocs_enumerate_headings_plugin.stream_html_page import StreamHTMLPage
+from tests.test_html_page import load_page, dummyPage
+
+THEMED_PAGE = """<!DOCTYPE html>
+<html>
+<head><script>var x = "<h1>not a heading</h1>";</script></head>
+<body>
+<nav class="toc">
+  <a href="#homepage">Homepage</a>
+  <a class="nav-link" href="#sub-heading">sub heading</a>
+  <a href="#deep">deep</a>
+  <a href="#dup">dup</a>
+  <a href="other.html">other page</a>
+</nav>
+<!-- <h2>commented out</h2> -->
+<div role="main">
+<h1 id="homepage">Homepage<a class="headerlink" href="#homepage">&para;</a></h1>
+<p>Some &amp; text<br>with a <a href=#sub-heading>link</a></p>
+<h2 id="sub-heading" class="x">sub heading</h2>
+<h4 id="deep">deep</h4>
+<h2 id="dup">dup</h2>
+<h3 id="dup">dup</h3>
+<h2/>
+</div>
+</body>
+</html>
+"""
+
+
+def enumerate_page(engine, content, chapter=1, toc_depth=6, add_span_element=True):
+    page = engine(content)
+    page.set_page_chapter(chapter)
+    page.enumerate_headings(add_span_element=add_span_element)
+    page.enumerate_toc(depth=toc_depth)
+    return str(page)
+
+
+def normalize(html):
+    return str(BeautifulSoup(html, "html.parser"))
+
+
+@pytest.mark.parametrize(
+    "path", sorted(glob.glob("tests/fixtures/pages/*.md"))
+)
+@pytest.mark.parametrize("add_span_element", [True, False])
+def test_same_output_as_beautifulsoup(path, add_span_element):
+    content = load_page(path)
+    expected = enumerate_page(HTMLPage, content, add_span_element=add_span_element)
+    result = enumerate_page(StreamHTMLPage, content, add_span_element=add_span_element)
+    assert normalize(result) == normalize(expected)
+
+
+@pytest.mark.parametrize("toc_depth", [0, 1, 2, 6])
+@pytest.mark.parametrize("chapter", [1, 3])
+def test_themed_page(toc_depth, chapter):
+    expected = enumerate_page(HTMLPage, THEMED_PAGE, chapter, toc_depth)
+    result = enumerate_page(StreamHTMLPage, THEMED_PAGE, chapter, toc_depth)
+    assert normalize(result) == normalize(expected)
+
+
+def test_other_bytes_untouched():
+    result = enumerate_page(StreamHTMLPage, THEMED_PAGE, add_span_element=False)
+    assert '<a href="#dup">1.2.1 1.2 dup</a>' in result
+    assert '<h2 id="sub-heading" class="x">1.1 sub heading</h2>' in result
+    # Removing the inserted numbers gives back the original page
+    result = re.sub(r"(?<=>)(\d[\d.]* )+", "", result)
+    assert result.replace("<h2></h2>", "<h2/>") == THEMED_PAGE
+
+
+def test_validate():
+    page = StreamHTMLPage("<h2>first</h2><h1>second</h1>")
+    with pytest.raises(AssertionError):
+        page.validate(page=dummyPage("first"), plugin_config={"strict": True})
+    assert StreamHTMLPage("<h1>first</h1>").validate(dummyPage("first"), {"strict": True})